@@ -0,0 +1,343 @@
+"""Where the time of POST /ask goes, end to end and fully offline.
+
+The agent client runs in this process under uvicorn with a scripted chat
+model in place of Groq. The model deterministically calls the tools of
+--script one step at a time and then answers. ``mcp_server.py`` runs
+locally over HTTP and is linked through POST /link, as an admin would link
+it. Every /ask then goes through the whole path: auth, the SQLite lookup of
+the linked servers, MCP tool discovery, agent construction, the model steps
+and the MCP tool calls. Each of these phases is timed per request:
+
+    tool_load     MultiServerMCPClient.get_tools: session setup and list_tools
+    agent_build   create_react_agent
+    llm_step      one call of the chat model (--llm-latency simulates the network)
+    tool_call     one MCP tool call, including the session the adapter opens for it
+    other         server time not in the phases above: auth, DB, the graph, HTTP
+
+No request leaves 127.0.0.1: GROQ_API_KEY only has to be set for ChatGroq
+to be constructed, and it is never called.
+
+Usage (from ai/agents):
+    python benchmarks/ask_phases.py [--concurrency 1 4 16] [--requests 32] [--script ping add find_files]
+                                    [--llm-latency 0] [--json out.json]
+"""
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from collections import defaultdict
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ["tool_load", "agent_build", "llm_step", "tool_call", "other"]
+
+# arguments the scripted model passes to each tool it can be told to call
+TOOL_ARGS = {
+    "ping": {"message": "bench"},
+    "add": {"a": 2, "b": 3},
+    "find_best_teacher": {"subject": "math"},
+    "find_files": {"pattern": "*.toml"},
+    "search_files": {"query": "FastMCP", "pattern": "*.py", "max_results": 5},
+    "execute_command": {"command": "ls"},
+}
+
+# (phase, seconds) pairs of the /ask request being served, set per request by _traced
+_trace = contextvars.ContextVar("ask_trace", default=None)
+
+
+def _record(phase: str, seconds: float):
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((phase, seconds))
+
+
+def _timed(phase: str, fn):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _record(phase, time.perf_counter() - start)
+    return wrapper
+
+
+def _timed_sync(phase: str, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _record(phase, time.perf_counter() - start)
+    return wrapper
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that calls the tools of ``script`` in order, one per step, then answers.
+
+    The step is the number of tool results since the last human message, so
+    the same conversation always gets the same reply.
+    """
+
+    script: list
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages) -> AIMessage:
+        results = []
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, ToolMessage):
+                results.append(message)
+        step = len(results)
+        if step < len(self.script):
+            name = self.script[step]
+            return AIMessage(content="", tool_calls=[
+                {"name": name, "args": TOOL_ARGS[name], "id": f"call_{step}", "type": "tool_call"}])
+        summary = "; ".join(f"{m.name}: {str(m.content)[:40]}" for m in reversed(results))
+        return AIMessage(content=f"Used {step} tools. {summary}")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def ainvoke(self, *args, **kwargs):
+        # timed around the whole runnable call, so callback and message handling count as well
+        start = time.perf_counter()
+        try:
+            return await super().ainvoke(*args, **kwargs)
+        finally:
+            _record("llm_step", time.perf_counter() - start)
+
+
+def _instrument(mcp_client, model: ScriptedChatModel):
+    """Swap in the scripted model and time discovery, agent construction and tool calls."""
+    libs = mcp_client._load_agent_libs()
+    libs["llm"] = model
+    libs["create_react_agent"] = _timed_sync("agent_build", libs["create_react_agent"])
+
+    load_tools = mcp_client._load_tools
+
+    async def timed_load_tools(client):
+        start = time.perf_counter()
+        tools = await load_tools(client)
+        _record("tool_load", time.perf_counter() - start)
+        for tool in tools:
+            tool.coroutine = _timed("tool_call", tool.coroutine)
+        return tools
+
+    mcp_client._load_tools = timed_load_tools
+
+
+def _traced(app, traces: list):
+    """ASGI wrapper giving every /ask request its own trace, kept with its total server time."""
+    async def traced_app(scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != "/ask":
+            return await app(scope, receive, send)
+        trace = []
+        token = _trace.set(trace)
+        start = time.perf_counter()
+        try:
+            await app(scope, receive, send)
+        finally:
+            _trace.reset(token)
+            traces.append((time.perf_counter() - start, trace))
+    return traced_app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _McpServer:
+    def __init__(self):
+        self.port = _free_port()
+        env = dict(os.environ, MCP_SERVER_PORT=str(self.port))
+        self.proc = subprocess.Popen([sys.executable, "mcp_server.py"], cwd=AGENTS_DIR, env=env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.url = f"http://127.0.0.1:{self.port}/mcp"
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def _summarize(concurrency: int, wall: float, latencies: list, traces: list) -> dict:
+    calls = defaultdict(list)
+    for total, trace in traces:
+        for phase, seconds in trace:
+            calls[phase].append(seconds)
+        calls["other"].append(total - sum(seconds for _, seconds in trace))
+    server_total = sum(total for total, _ in traces)
+    latencies = sorted(latencies)
+    phases = {}
+    for phase in PHASES:
+        values = sorted(calls[phase])
+        if not values:
+            continue
+        phases[phase] = {
+            "calls_per_ask": round(len(values) / len(traces), 2),
+            "mean_ms": round(statistics.fmean(values) * 1000, 2),
+            "p50_ms": round(statistics.median(values) * 1000, 2),
+            "p95_ms": round(_percentile(values, 0.95) * 1000, 2),
+            "share": round(sum(values) / server_total, 3),
+        }
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "asks_per_s": round(len(latencies) / wall, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "phases": phases,
+    }
+
+
+async def _ask(client: httpx.AsyncClient, headers: dict, question: str):
+    resp = await client.post("/ask", headers=headers, json={"question": question})
+    resp.raise_for_status()
+    return resp.json()["answer"]
+
+
+async def _run_level(client, headers, concurrency: int, requests: int, traces: list) -> dict:
+    traces.clear()
+    latencies = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await _ask(client, headers, f"benchmark question {i}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summarize(concurrency, time.perf_counter() - start, latencies, list(traces))
+
+
+async def _wait_for_mcp(client: httpx.AsyncClient, admin: dict, mcp: _McpServer, timeout: float = 30.0):
+    """Link the MCP server, retrying while it is still starting."""
+    deadline = time.monotonic() + timeout
+    while True:
+        resp = await client.post("/link", headers=admin, json={"name": "local", "url": mcp.url})
+        if resp.status_code == 200:
+            return resp.json()["tool_count"]
+        if time.monotonic() > deadline or mcp.proc.poll() is not None:
+            raise RuntimeError(f"could not link the MCP server: {resp.text}")
+        await asyncio.sleep(0.3)
+
+
+async def main_async(args) -> list:
+    import uvicorn
+
+    sys.path.insert(0, AGENTS_DIR)
+    import mcp_client
+
+    _instrument(mcp_client, ScriptedChatModel(script=args.script, latency=args.llm_latency))
+    traces = []
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(_traced(mcp_client.app, traces), host="127.0.0.1", port=port,
+                                           log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    mcp = _McpServer()
+    results = []
+    try:
+        while not server.started:
+            await asyncio.sleep(0.05)
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+            resp = await client.post("/auth/login", json={"email": "admin@admin.com",
+                                                          "password": os.environ["ADMIN_PASSWORD"]})
+            resp.raise_for_status()
+            admin = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+            tool_count = await _wait_for_mcp(client, admin, mcp)
+            resp = await client.post("/auth/register", json={"email": "ask@example.com", "password": "bench"})
+            resp.raise_for_status()
+            headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+            answer = await _ask(client, headers, "warm up")  # builds the file index behind find_files
+            print(f"linked {tool_count} tools; scripted answer: {answer[:100]}")
+            for level in args.concurrency:
+                row = await _run_level(client, headers, level, args.requests, traces)
+                results.append(row)
+                _print_level(row)
+    finally:
+        mcp.stop()
+        server.should_exit = True
+        await serve_task
+    return results
+
+
+def _print_level(row: dict):
+    print(f"\nconcurrency {row['concurrency']}: {row['asks_per_s']:.2f} asks/s, "
+          f"p50 {row['p50_ms']:.1f} ms, p95 {row['p95_ms']:.1f} ms")
+    print(f"  {'phase':<12}{'calls/ask':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'share':>8}")
+    for phase, stats in row["phases"].items():
+        print(f"  {phase:<12}{stats['calls_per_ask']:>10.2f}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}"
+              f"{stats['p95_ms']:>10.2f}{stats['share']:>8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="asks per concurrency level")
+    parser.add_argument("--script", nargs="+", choices=sorted(TOOL_ARGS), default=["ping", "add", "find_files"],
+                        help="tools the scripted model calls, in order")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds each model step sleeps")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    # mcp_client still uses langgraph's create_react_agent, which warns on every /ask
+    warnings.filterwarnings("ignore", message="create_react_agent has been moved")
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+    workdir = tempfile.mkdtemp(prefix="agents-ask-")
+    # the client's database and request log go to the scratch directory
+    os.chdir(workdir)
+    os.environ.update(RATE_LIMIT_ENABLED="0", ADMIN_PASSWORD=os.getenv("ADMIN_PASSWORD", "ask-bench"),
+                      GROQ_API_KEY=os.getenv("GROQ_API_KEY", "offline"),
+                      GROQ_MODEL=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"))
+    try:
+        results = asyncio.run(main_async(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Cold start of the agent client and the iris API: import profile and time to first response.
+
+For each app this runs ``python -X importtime -c "import <module>"`` a few
+times and reports the best total import time plus the packages that
+account for most of it (self time summed per top-level package). It then
+starts the app under uvicorn in a scratch directory and measures the time
+until its health route answers, once on an empty directory (first boot,
+which for the agent client creates the admin user) and once more on the
+same directory (restart).
+
+Pass ``--src before=<dir>`` pointing at another checkout's ``ai`` directory
+to compare, e.g. after ``git worktree add /tmp/before <commit>``:
+    python benchmarks/cold_start.py --src before=/tmp/before/ai --src after=..
+
+Usage (from ai/agents):
+    python benchmarks/cold_start.py [--src [label=]dir ...] [--apps agents iris] [--repeat 3] [--top 8]
+                                    [--json out.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+
+AI_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# name: (directory below ai/, module, route that answers once the app is up)
+APPS = {
+    "agents": ("agents", "mcp_client", "/health"),
+    "iris": ("iris", "iris", "/"),
+}
+
+
+def _env() -> dict:
+    # the agent client used to build its ChatGroq client at import, which needs these set
+    return dict(os.environ, GROQ_API_KEY=os.getenv("GROQ_API_KEY", "cold-start-bench"),
+                GROQ_MODEL=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def import_profile(app_dir: str, module: str, workdir: str) -> tuple:
+    """(total seconds, {package: self seconds}) from one ``-X importtime`` run."""
+    env = dict(_env(), PYTHONPATH=app_dir)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=workdir, env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+    total = 0.0
+    packages = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1e6
+        if name.strip() == module and not name.startswith("  "):
+            total = int(cumulative_us) / 1e6
+    return total, dict(packages)
+
+
+def time_to_ready(app_dir: str, module: str, route: str, workdir: str, timeout: float = 120.0) -> float:
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", f"{module}:app", "--host", "127.0.0.1", "--port", str(port),
+           "--app-dir", app_dir]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=workdir, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{module} exited with {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{route}", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"{module} did not answer {route} within {timeout}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def measure(label: str, ai_dir: str, app: str, repeat: int, top: int) -> dict:
+    subdir, module, route = APPS[app]
+    app_dir = os.path.join(os.path.abspath(ai_dir), subdir)
+    workdir = tempfile.mkdtemp(prefix=f"cold-start-{app}-")
+    try:
+        profiles = [import_profile(app_dir, module, workdir) for _ in range(repeat)]
+        total, packages = min(profiles, key=lambda p: p[0])
+        shutil.rmtree(workdir)
+        os.makedirs(workdir)
+        first_boot = time_to_ready(app_dir, module, route, workdir)
+        restart = min(time_to_ready(app_dir, module, route, workdir) for _ in range(repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    heaviest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "tree": label,
+        "app": app,
+        "import_s": round(total, 3),
+        "first_boot_s": round(first_boot, 3),
+        "restart_s": round(restart, 3),
+        "heaviest_packages_s": {name: round(seconds, 3) for name, seconds in heaviest},
+    }
+
+
+def _parse_src(value: str) -> tuple:
+    label, sep, path = value.partition("=")
+    return (label, path) if sep else (value, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", type=_parse_src, action="append", help="[label=]path of an ai directory")
+    parser.add_argument("--apps", nargs="+", choices=sorted(APPS), default=list(APPS))
+    parser.add_argument("--repeat", type=int, default=3, help="import runs and restarts; the best is kept")
+    parser.add_argument("--top", type=int, default=8, help="packages listed per app")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    trees = args.src or [("current", AI_DIR)]
+    results = []
+    for label, ai_dir in trees:
+        for app in args.apps:
+            row = measure(label, ai_dir, app, args.repeat, args.top)
+            results.append(row)
+            print(f"\n[{label}] {app}: import {row['import_s']:.3f}s, first boot {row['first_boot_s']:.3f}s, "
+                  f"restart {row['restart_s']:.3f}s")
+            for name, seconds in row["heaviest_packages_s"].items():
+                print(f"  {name:<28}{seconds * 1000:>9.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"config": {"apps": args.apps, "repeat": args.repeat, "trees": dict(trees)},
+                       "python": sys.version.split()[0], "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Throughput of concurrent execute_command calls against a local MCP server.
+
+Starts ``mcp_server.py`` over HTTP, once with blocking tools run inline on the
+event loop (MCP_TOOL_OFFLOAD=0) and once offloaded to worker threads, and
+fires ``cat``/``ls`` calls from several clients at each concurrency level.
+
+Usage (from ai/agents):
+    python benchmarks/concurrent_tools.py [--concurrency 1 8 32] [--requests 200] [--file-mb 4]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fastmcp import Client
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKSPACE_ROOT = os.path.abspath(os.path.join(AGENTS_DIR, "..", ".."))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _make_fixture(file_mb: float) -> str:
+    """A scratch directory inside the workspace holding one large file and some small ones."""
+    root = tempfile.mkdtemp(prefix=".mcp-bench-", dir=WORKSPACE_ROOT)
+    line = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod\n"
+    with open(os.path.join(root, "big.log"), "w") as f:
+        f.write(line * max(1, int(file_mb * (1 << 20) / len(line))))
+    for i in range(200):
+        with open(os.path.join(root, f"small_{i:03d}.txt"), "w") as f:
+            f.write(line * 5)
+    return root
+
+
+class _Server:
+    def __init__(self, offload: bool, concurrency: int):
+        self.port = _free_port()
+        env = dict(os.environ, MCP_SERVER_PORT=str(self.port), MCP_TOOL_OFFLOAD="1" if offload else "0",
+                   MCP_TOOL_CONCURRENCY=str(concurrency))
+        self.proc = subprocess.Popen([sys.executable, "mcp_server.py"], cwd=AGENTS_DIR, env=env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.url = f"http://127.0.0.1:{self.port}/mcp"
+
+    async def wait_ready(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                async with Client(self.url) as client:
+                    await client.ping()
+                    return
+            except Exception:
+                await asyncio.sleep(0.2)
+        raise RuntimeError("MCP server did not start")
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+async def _run_level(url: str, commands, concurrency: int, requests: int) -> dict:
+    latencies = []
+    counter = iter(range(requests))
+
+    async def worker():
+        async with Client(url) as client:
+            for i in counter:
+                start = time.perf_counter()
+                await client.call_tool("execute_command", {"command": commands[i % len(commands)]})
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+    }
+
+
+async def main_async(args) -> list:
+    fixture = _make_fixture(args.file_mb)
+    rel = os.path.relpath(fixture, WORKSPACE_ROOT)
+    commands = [f"cat {rel}/big.log", f"ls {rel}", f"tail {rel}/big.log 50", f"cat {rel}/small_007.txt"]
+    results = []
+    try:
+        for offload in (False, True):
+            server = _Server(offload, max(args.concurrency))
+            try:
+                await server.wait_ready()
+                for level in args.concurrency:
+                    row = await _run_level(server.url, commands, level, args.requests)
+                    row["mode"] = "offload" if offload else "inline"
+                    results.append(row)
+                    print(f"{row['mode']:<8}{row['concurrency']:>6}{row['throughput_rps']:>10.1f}"
+                          f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}")
+            finally:
+                server.stop()
+    finally:
+        shutil.rmtree(fixture, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="tool calls per concurrency level")
+    parser.add_argument("--file-mb", type=float, default=4.0, help="size of the file read by cat/tail")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    results = asyncio.run(main_async(args))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
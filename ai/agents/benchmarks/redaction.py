@@ -0,0 +1,78 @@
+"""Microbenchmark: per-line substring redaction vs the compiled Redactor.
+
+Usage (from ai/agents):
+    python benchmarks/redaction.py [--mb 10] [--secret-ratio 0.01] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from redaction import Redactor  # noqa: E402
+from mcp_server import REDACT_PATTERNS  # noqa: E402
+
+_WORDS = ("the quick brown fox jumps over lazy dog import os def return value "
+          "config host port name self print for in if else while").split()
+_SECRETS = ("token=abc", "PASSWORD: hunter2", "ssh-rsa AAAA", "api_key = x")
+
+
+def legacy_redact(text: str) -> str:
+    """The original per-line, per-pattern implementation."""
+    out_lines = []
+    for line in text.splitlines():
+        low = line.lower()
+        if any(pat in low for pat in REDACT_PATTERNS):
+            out_lines.append("[REDACTED]")
+        else:
+            out_lines.append(line)
+    return "\n".join(out_lines)
+
+
+def make_text(mb: float, secret_ratio: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    target = int(mb * (1 << 20))
+    while size < target:
+        line = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 16)))
+        if rng.random() < secret_ratio:
+            line += " " + rng.choice(_SECRETS)
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def _best_of(fn, text: str, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    return min(samples), statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=10.0, help="size of the generated text")
+    parser.add_argument("--secret-ratio", type=float, default=0.01, help="fraction of lines holding a secret")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = make_text(args.mb, args.secret_ratio)
+    redactor = Redactor(REDACT_PATTERNS)
+    if legacy_redact(text) != redactor.redact(text):
+        raise SystemExit("Redactor output differs from the legacy implementation")
+
+    mb = len(text) / (1 << 20)
+    print(f"{mb:.1f} MiB, {text.count(chr(10)) + 1} lines, secret ratio {args.secret_ratio}")
+    print(f"{'impl':<10}{'best s':>10}{'median s':>10}{'MiB/s':>10}")
+    for name, fn in (("legacy", legacy_redact), ("compiled", redactor.redact)):
+        best, median = _best_of(fn, text, args.repeat)
+        print(f"{name:<10}{best:>10.3f}{median:>10.3f}{mb / best:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
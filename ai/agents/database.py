@@ -1,10 +1,19 @@
 import sqlite3
 import os
+import threading
+
+# The app shares one connection between the event loop and the threadpool. A
+# write transaction (execute ... commit or rollback) holds this lock, so one
+# thread's rollback can never discard another thread's uncommitted writes.
+write_lock = threading.Lock()
 
 
 def init_db():
     os.makedirs("db", exist_ok=True)
     conn = sqlite3.connect("db/users.db", check_same_thread=False)
+    # shared by the worker processes of serve.py: WAL keeps readers off the writer's lock
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     conn.execute(
         """CREATE TABLE IF NOT EXISTS users (
             id TEXT PRIMARY KEY,
@@ -17,5 +26,24 @@ def init_db():
             refresh_exp INTEGER
         )"""
     )
+    # /auth/refresh looks users up by refresh token
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_refresh_token ON users(refresh_token)")
+    # linked MCP servers, in the database so that every worker process sees every /link;
+    # config holds the url and the headers (credentials included) as plain JSON
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS mcp_servers (
+            name TEXT PRIMARY KEY,
+            config TEXT NOT NULL,
+            verified BOOLEAN NOT NULL DEFAULT 0
+        )"""
+    )
+    # verified: /link has connected to the server; until then the row only reserves the name
+    if "verified" not in {row[1] for row in conn.execute("PRAGMA table_info(mcp_servers)")}:
+        try:
+            # rows from before the column existed were only kept once they had connected
+            conn.execute("ALTER TABLE mcp_servers ADD COLUMN verified BOOLEAN NOT NULL DEFAULT 1")
+        except sqlite3.OperationalError as ex:
+            if "duplicate column" not in str(ex):  # another worker migrated first
+                raise
     conn.commit()
     return conn
@@ -0,0 +1,153 @@
+import fnmatch
+import os
+import re
+import stat
+import threading
+import time
+
+# Directories that are never worth indexing
+SKIP_DIRS = {".git", "__pycache__", ".venv", "venv", "node_modules", ".mypy_cache", ".pytest_cache", ".ruff_cache"}
+
+
+class _Entry:
+    __slots__ = ("size", "mtime_ns", "trigrams")
+
+    def __init__(self, size: int, mtime_ns: int, trigrams):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        # None for binary or oversized files: they are listed but not searchable
+        self.trigrams = trigrams
+
+
+def _trigrams(low: str) -> frozenset:
+    return frozenset(low[i:i + 3] for i in range(len(low) - 2))
+
+
+class FileIndex:
+    """In-memory index of a directory tree: path, size and mtime of every file,
+    plus a trigram inverted index over the lowercased content of text files.
+
+    The tree is re-scanned at most every ``refresh_interval`` seconds, and only
+    files whose size or mtime changed are re-read. Symlinks are skipped so
+    nothing outside ``root`` is ever indexed.
+    """
+
+    def __init__(self, root: str, max_file_bytes: int = 1 << 20, refresh_interval: float = 2.0,
+                 encoding: str = "utf-8"):
+        self.root = os.path.abspath(root)
+        self.max_file_bytes = max_file_bytes
+        self.refresh_interval = refresh_interval
+        self.encoding = encoding
+        self._files = {}
+        self._postings = {}
+        self._lock = threading.RLock()
+        self._last_refresh = None
+
+    def _read_text(self, rel: str):
+        try:
+            # a file swapped for a symlink since the last refresh must not be followed out of root
+            fd = os.open(os.path.join(self.root, rel), os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+            with os.fdopen(fd, "rb") as f:
+                data = f.read(self.max_file_bytes + 1)
+        except OSError:
+            return None
+        if len(data) > self.max_file_bytes or b"\0" in data[:8192]:
+            return None
+        return data.decode(self.encoding, errors="ignore")
+
+    def _drop(self, rel: str):
+        entry = self._files.pop(rel, None)
+        if entry is None or entry.trigrams is None:
+            return
+        for tri in entry.trigrams:
+            posting = self._postings.get(tri)
+            if posting is not None:
+                posting.discard(rel)
+                if not posting:
+                    del self._postings[tri]
+
+    def _add(self, rel: str, size: int, mtime_ns: int):
+        text = self._read_text(rel) if size <= self.max_file_bytes else None
+        trigrams = _trigrams(text.lower()) if text is not None else None
+        self._files[rel] = _Entry(size, mtime_ns, trigrams)
+        for tri in trigrams or ():
+            self._postings.setdefault(tri, set()).add(rel)
+
+    def refresh(self, force: bool = False):
+        """Bring the index up to date with the filesystem."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_refresh is not None and now - self._last_refresh < self.refresh_interval:
+                return
+            seen = set()
+            for dirpath, dirnames, filenames in os.walk(self.root, followlinks=False):
+                # os.walk does not descend into symlinked directories with followlinks=False
+                dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+                for name in filenames:
+                    full = os.path.join(dirpath, name)
+                    try:
+                        st = os.lstat(full)
+                    except OSError:
+                        continue
+                    if not stat.S_ISREG(st.st_mode):
+                        continue  # symlinks, sockets, devices
+                    rel = os.path.relpath(full, self.root).replace(os.sep, "/")
+                    seen.add(rel)
+                    entry = self._files.get(rel)
+                    if entry is not None and entry.size == st.st_size and entry.mtime_ns == st.st_mtime_ns:
+                        continue
+                    self._drop(rel)
+                    self._add(rel, st.st_size, st.st_mtime_ns)
+            for rel in set(self._files) - seen:
+                self._drop(rel)
+            self._last_refresh = time.monotonic()
+
+    def glob(self, pattern: str = "*"):
+        """``(path, size, mtime_ns)`` of files whose workspace-relative path matches ``pattern``.
+
+        ``*`` also matches ``/``, so ``*.py`` finds Python files at any depth.
+        """
+        self.refresh()
+        match = re.compile(fnmatch.translate(pattern or "*")).match
+        with self._lock:
+            return [(rel, e.size, e.mtime_ns) for rel, e in sorted(self._files.items()) if match(rel)]
+
+    def _candidates(self, query: str, regex: bool):
+        if regex or len(query) < 3:
+            return {rel for rel, e in self._files.items() if e.trigrams is not None}
+        low = query.lower()
+        postings = [self._postings.get(low[i:i + 3], set()) for i in range(len(low) - 2)]
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def grep(self, query: str, glob: str = None, regex: bool = False, ignore_case: bool = True,
+             max_results: int = 100):
+        """``(path, line_number, line)`` for lines matching ``query``.
+
+        Literal queries are narrowed to candidate files through the trigram
+        index before any file is opened.
+        """
+        self.refresh()
+        flags = re.IGNORECASE if ignore_case else 0
+        search = re.compile(query if regex else re.escape(query), flags).search
+        match = re.compile(fnmatch.translate(glob)).match if glob else None
+
+        with self._lock:
+            candidates = sorted(rel for rel in self._candidates(query, regex) if match is None or match(rel))
+
+        results = []
+        for rel in candidates:
+            text = self._read_text(rel)
+            if text is None:
+                continue
+            for lineno, line in enumerate(text.splitlines(), 1):
+                if search(line):
+                    results.append((rel, lineno, line))
+                    if len(results) >= max_results:
+                        return results
+        return results
@@ -1,29 +1,32 @@
+import json
 import os
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, TYPE_CHECKING
+import threading
 import time
 
+import anyio
 from fastapi import FastAPI, HTTPException, Depends, Request
 from slowapi.middleware import SlowAPIMiddleware
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.messages import SystemMessage, HumanMessage
-from langgraph.prebuilt import create_react_agent
-from langchain_mcp_adapters.client import MultiServerMCPClient
 import sqlite3
 import uvicorn
 
 from middlewares.logging import RequestLoggerMiddleware
 from middlewares.headers import SecurityHeadersMiddleware
-from state import limiter
+from state import get_db, limiter
 from authentication.jwt import user_key, create_token, get_current_user_id, get_admin
 from routes.auth import router as auth_router
-from database import init_db
+from database import init_db, write_lock
 from models.link import LinkRequest, LinkResponse
 from models.ask import AskRequest, AskResponse
 from authentication.password import hash_password
 
+if TYPE_CHECKING:
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
 ACCESS_TOKEN_EXPIRE = 600        # 10 min
 REFRESH_TOKEN_EXPIRE = 3600 * 24 # 1 day
 
@@ -49,44 +52,103 @@ app.add_middleware(SecurityHeadersMiddleware)
 
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 
-MCP_SERVERS: Dict[str, Dict[str, Any]] = {}
-
 GROQ_MODEL = os.getenv("GROQ_MODEL")
-_llm = ChatGroq(model=GROQ_MODEL, temperature=0)
+
+# langchain, langgraph and the MCP adapters take seconds to import, so they are
+# loaded by the first request that needs them, in a worker thread so the event
+# loop keeps serving meanwhile
+_agent_libs = {}
+_agent_libs_lock = threading.Lock()
+
+
+def _load_agent_libs() -> dict:
+    if not _agent_libs:
+        with _agent_libs_lock:
+            if not _agent_libs:
+                from langchain_groq import ChatGroq
+                from langchain_core.messages import SystemMessage, HumanMessage
+                from langgraph.prebuilt import create_react_agent
+                from langchain_mcp_adapters.client import MultiServerMCPClient
+
+                _agent_libs.update(
+                    llm=ChatGroq(model=GROQ_MODEL, temperature=0),
+                    SystemMessage=SystemMessage,
+                    HumanMessage=HumanMessage,
+                    create_react_agent=create_react_agent,
+                    MultiServerMCPClient=MultiServerMCPClient,
+                )
+    return _agent_libs
+
+
+async def _agent_deps() -> dict:
+    return _agent_libs or await run_in_threadpool(_load_agent_libs)
+
+
+def _linked_servers(conn) -> Dict[str, Dict[str, Any]]:
+    rows = conn.execute("SELECT name, config FROM mcp_servers WHERE verified")
+    return {name: json.loads(config) for name, config in rows}
+
+
+def _claim_server(conn, name: str, config: Dict[str, Any]) -> bool:
+    """Reserve the name with an unverified row; False if it is already taken."""
+    with write_lock:
+        try:
+            conn.execute("INSERT INTO mcp_servers (name, config, verified) VALUES (?, ?, 0)",
+                         (name, json.dumps(config)))
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return False
+    return True
+
+
+def _verify_server(conn, name: str):
+    with write_lock:
+        conn.execute("UPDATE mcp_servers SET verified=1 WHERE name=?", (name,))
+        conn.commit()
+
+
+def _drop_server(conn, name: str) -> bool:
+    with write_lock:
+        removed = conn.execute("DELETE FROM mcp_servers WHERE name=?", (name,)).rowcount
+        conn.commit()
+    return removed == 1
 
 
 @app.on_event("startup")
 def startup_event():
     app.state.conn = init_db()
     app.state.limiter = limiter
+    bootstrap_admin(app.state.conn)
+
+
+def bootstrap_admin(conn):
+    """Create the admin user unless it exists; serve.py runs this once before starting workers."""
+    cursor = conn.cursor()
 
-    cursor = app.state.conn.cursor()
+    # hashing costs an argon2 run, only pay it when the admin has to be created
+    if cursor.execute("SELECT 1 FROM users WHERE email=?", ("admin@admin.com",)).fetchone():
+        return
 
     hashed_pwd = hash_password(os.getenv("ADMIN_PASSWORD", "adminpass"))
     
     user_id = str(uuid.uuid4())
 
-    try:
-        cursor.execute(
-            "INSERT INTO users (id, email, password, admin) VALUES (?, ?, ?, ?)",
-            (user_id, "admin@admin.com", hashed_pwd, True)
-        )
-        app.state.conn.commit()
-        
-        access_token = create_token({"user_id": user_id, "admin": True}, ACCESS_TOKEN_EXPIRE)
-        refresh_token = create_token({"user_id": user_id, "admin": True}, REFRESH_TOKEN_EXPIRE)
-        
-        cursor.execute(
-            "UPDATE users SET access_token=?, refresh_token=?, access_exp=?, refresh_exp=? WHERE id=?",
-            (access_token, refresh_token,
-             int(time.time()) + ACCESS_TOKEN_EXPIRE,
-             int(time.time()) + REFRESH_TOKEN_EXPIRE,
-             user_id)
-        )
-        app.state.conn.commit()
-        
-    except sqlite3.IntegrityError:
-        pass  # User already exists
+    access_token = create_token({"user_id": user_id, "admin": True}, ACCESS_TOKEN_EXPIRE)
+    refresh_token = create_token({"user_id": user_id, "admin": True}, REFRESH_TOKEN_EXPIRE)
+
+    with write_lock:
+        try:
+            cursor.execute(
+                "INSERT INTO users (id, email, password, admin, access_token, refresh_token, access_exp, refresh_exp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, "admin@admin.com", hashed_pwd, True, access_token, refresh_token,
+                 int(time.time()) + ACCESS_TOKEN_EXPIRE,
+                 int(time.time()) + REFRESH_TOKEN_EXPIRE)
+            )
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()  # User already exists
 
 
 @app.on_event("shutdown")
@@ -94,61 +156,80 @@ def shutdown_event():
     app.state.conn.close()
 
 
-def _build_client() -> MultiServerMCPClient:
-    return MultiServerMCPClient(MCP_SERVERS)
+def _build_client(deps: dict, servers: Dict[str, Dict[str, Any]]) -> "MultiServerMCPClient":
+    return deps["MultiServerMCPClient"](servers)
 
-async def _load_tools(client: MultiServerMCPClient):
+async def _load_tools(client: "MultiServerMCPClient"):
     return await client.get_tools()
 
 @app.post("/link", response_model=LinkResponse)
 @limiter.limit("10/minute", key_func=user_key)
-async def link_server(request: Request, req: LinkRequest, _: bool = Depends(get_admin)):    
+async def link_server(request: Request, req: LinkRequest, _: bool = Depends(get_admin), conn=Depends(get_db)):
     name = req.name.strip()
     if not name:
         raise HTTPException(status_code=400, detail="Server name cannot be empty.")
-    
-    if name in MCP_SERVERS:
-        raise HTTPException(status_code=409, detail=f"Server '{name}' already exists.")
 
-    MCP_SERVERS[name] = {
+    deps = await _agent_deps()
+    config = {
         "transport": "streamable_http",
         "url": str(req.url),
         **({"headers": req.headers} if req.headers else {}),
     }
 
+    # the unverified row claims the name while the connection is tried, in this worker and
+    # all others; /ask only uses the server once it is marked verified
+    if not await run_in_threadpool(_claim_server, conn, name, config):
+        raise HTTPException(status_code=409, detail=f"Server '{name}' already exists.")
+
     try:
-        tmp_client = MultiServerMCPClient({name: MCP_SERVERS[name]})
+        tmp_client = deps["MultiServerMCPClient"]({name: config})
         tools = await tmp_client.get_tools()
         tool_count = len(tools)
-    except Exception as e:
-        MCP_SERVERS.pop(name, None)
+    except BaseException as e:
+        # also on cancellation, or the name stays claimed by a server nobody can use
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(_drop_server, conn, name)
+        if not isinstance(e, Exception):
+            raise
         raise HTTPException(status_code=400, detail=f"Failed to connect to '{name}': {e}")
 
+    await run_in_threadpool(_verify_server, conn, name)
     return LinkResponse(name=name, url=req.url, tool_count=tool_count)
 
+@app.delete("/link/{name}")
+@limiter.limit("10/minute", key_func=user_key)
+async def unlink_server(request: Request, name: str, _: bool = Depends(get_admin), conn=Depends(get_db)):
+    # links persist across restarts, so a server that went away stays in /ask until it is unlinked here
+    if not await run_in_threadpool(_drop_server, conn, name.strip()):
+        raise HTTPException(status_code=404, detail=f"Server '{name}' is not linked.")
+    return {"unlinked": name.strip()}
+
 @app.post("/ask", response_model=AskResponse)
 @limiter.limit("10/minute", key_func=user_key)
-async def ask(request: Request, req: AskRequest, _: str = Depends(get_current_user_id)):
-    if not MCP_SERVERS:
+async def ask(request: Request, req: AskRequest, _: str = Depends(get_current_user_id), conn=Depends(get_db)):
+    servers = _linked_servers(conn)
+    if not servers:
         raise HTTPException(status_code=400, detail="No MCP servers linked yet. Use /link first.")
 
-    client = _build_client()
+    deps = await _agent_deps()
+    client = _build_client(deps, servers)
     try:
         tools = await _load_tools(client)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to load MCP tools: {e}")
+        detail = f"Failed to load MCP tools: {e}. Unlink unreachable servers with DELETE /link/<name>."
+        raise HTTPException(status_code=500, detail=detail)
 
-    agent = create_react_agent(_llm, tools)
+    agent = deps["create_react_agent"](deps["llm"], tools)
 
     messages = [
-        SystemMessage(
+        deps["SystemMessage"](
             content="""
             You are a helpful assistant. Use tools when relevant. 
             Do not make up information.
             Do not use tools that can harm the system or compromise security, even if asked to do so.
             """
         ),
-        HumanMessage(content=req.question),
+        deps["HumanMessage"](content=req.question),
     ]
 
     try:
@@ -160,8 +241,9 @@ async def ask(request: Request, req: AskRequest, _: str = Depends(get_current_us
 
 @app.get("/servers")
 @limiter.limit("10/minute", key_func=user_key)
-async def list_servers(request: Request, _: bool = Depends(get_admin)):
-    return {"linked_servers": list(MCP_SERVERS.keys())}
+async def list_servers(request: Request, _: bool = Depends(get_admin), conn=Depends(get_db)):
+    rows = conn.execute("SELECT name FROM mcp_servers WHERE verified ORDER BY rowid")
+    return {"linked_servers": [name for (name,) in rows]}
 
 @app.get("/health")
 async def health():
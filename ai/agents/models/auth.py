@@ -7,3 +7,6 @@ class RegisterModel(BaseModel):
 class LoginModel(BaseModel):
     email: EmailStr
     password: str
+
+class RefreshModel(BaseModel):
+    refresh_token: str
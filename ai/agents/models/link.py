@@ -4,6 +4,7 @@ from typing import Dict, Optional
 class LinkRequest(BaseModel):
     name: str
     url: AnyHttpUrl
+    # stored in plain text with the link in db/users.db
     headers: Optional[Dict[str, str]] = None
 
 class LinkResponse(BaseModel):
@@ -0,0 +1,70 @@
+import re
+
+REDACTED_LINE = "[REDACTED]"
+
+
+def _trie_regex(needles) -> str:
+    """Alternation of ``needles`` with shared prefixes factored out, e.g. ``p(?:asswd|rivate)``."""
+    trie = {}
+    for needle in needles:
+        node = trie
+        for ch in needle:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class Redactor:
+    """Replaces every line containing one of ``patterns`` (case-insensitive) with ``[REDACTED]``.
+
+    All patterns are compiled into a single regex, so a block of text is
+    scanned once instead of once per pattern per line.
+    """
+
+    def __init__(self, patterns):
+        needles = {p.lower() for p in patterns if p}
+        # a line containing a longer pattern also contains any pattern inside it
+        needles = sorted(n for n in needles if not any(o != n and o in n for o in needles))
+        self.patterns = tuple(needles)
+        self.max_len = max((len(n) for n in needles), default=0)
+        self._search = re.compile(_trie_regex(needles)).search if needles else None
+
+    def contains(self, text: str) -> bool:
+        """True if ``text`` contains any pattern."""
+        return self._search is not None and self._search(text.lower()) is not None
+
+    def redact(self, text: str) -> str:
+        """Redact the ``\\n``-separated lines of ``text``, keeping the line structure."""
+        if self._search is None:
+            return text
+        low = text.lower()
+        if len(low) != len(text):
+            # lowercasing changed some lengths, so offsets in low do not map onto text
+            return "\n".join(REDACTED_LINE if self.contains(line) else line for line in text.split("\n"))
+
+        parts = []
+        last = 0
+        pos = 0
+        while True:
+            m = self._search(low, pos)
+            if m is None:
+                break
+            start = low.rfind("\n", 0, m.start()) + 1
+            end = low.find("\n", m.end())
+            if end < 0:
+                end = len(low)
+            parts.append(text[last:start])
+            parts.append(REDACTED_LINE)
+            last = pos = end
+        if not parts:
+            return text
+        parts.append(text[last:])
+        return "".join(parts)
@@ -4,8 +4,9 @@ import uuid
 import sqlite3
 from fastapi import APIRouter, HTTPException, Depends, Request
 
+from database import write_lock
 from state import get_db, limiter
-from models.auth import LoginModel, RegisterModel
+from models.auth import LoginModel, RefreshModel, RegisterModel
 from authentication.password import hash_password, verify_password
 from authentication.jwt import create_token, user_key
 
@@ -25,27 +26,22 @@ def register_user(request: Request, body: RegisterModel, conn=Depends(get_db)):
     # Generate a UUID for the new user
     user_id = str(uuid.uuid4())
 
-    try:
-        cursor.execute(
-            "INSERT INTO users (id, email, password, admin) VALUES (?, ?, ?, ?)",
-            (user_id, body.email, hashed_pwd, False)
-        )
-        conn.commit()
-        
-        access_token = create_token({"user_id": user_id, "admin": False}, ACCESS_TOKEN_EXPIRE)
-        refresh_token = create_token({"user_id": user_id,  "admin": False}, REFRESH_TOKEN_EXPIRE)
-        
-        cursor.execute(
-            "UPDATE users SET access_token=?, refresh_token=?, access_exp=?, refresh_exp=? WHERE id=?",
-            (access_token, refresh_token,
-             int(time.time()) + ACCESS_TOKEN_EXPIRE,
-             int(time.time()) + REFRESH_TOKEN_EXPIRE,
-             user_id)
-        )
-        conn.commit()
-        
-    except sqlite3.IntegrityError:
-        raise HTTPException(status_code=400, detail="User already registered")
+    access_token = create_token({"user_id": user_id, "admin": False}, ACCESS_TOKEN_EXPIRE)
+    refresh_token = create_token({"user_id": user_id,  "admin": False}, REFRESH_TOKEN_EXPIRE)
+
+    with write_lock:
+        try:
+            cursor.execute(
+                "INSERT INTO users (id, email, password, admin, access_token, refresh_token, access_exp, refresh_exp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, body.email, hashed_pwd, False, access_token, refresh_token,
+                 int(time.time()) + ACCESS_TOKEN_EXPIRE,
+                 int(time.time()) + REFRESH_TOKEN_EXPIRE)
+            )
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            raise HTTPException(status_code=400, detail="User already registered")
 
     return {"access_token": access_token, "refresh_token": refresh_token}
 
@@ -70,20 +66,58 @@ def login_user(request: Request, body: LoginModel, conn=Depends(get_db)):
     if refresh_exp > now:
         # refresh valid -> reuse it, just issue new access_token
         new_access = create_token({"user_id": user_id, "admin": admin}, ACCESS_TOKEN_EXPIRE)
-        cursor.execute(
-            "UPDATE users SET access_token=?, access_exp=? WHERE id=?",
-            (new_access, now + ACCESS_TOKEN_EXPIRE, user_id)
-        )
-        conn.commit()
+        with write_lock:
+            cursor.execute(
+                "UPDATE users SET access_token=?, access_exp=? WHERE id=?",
+                (new_access, now + ACCESS_TOKEN_EXPIRE, user_id)
+            )
+            conn.commit()
         return {"access_token": new_access}
     else:
         # refresh expired -> create new pair
         new_access = create_token({"user_id": user_id, "admin": admin}, ACCESS_TOKEN_EXPIRE)
         new_refresh = create_token({"user_id": user_id, "admin": admin}, REFRESH_TOKEN_EXPIRE)
+        with write_lock:
+            cursor.execute(
+                "UPDATE users SET access_token=?, refresh_token=?, access_exp=?, refresh_exp=? WHERE id=?",
+                (new_access, new_refresh, now + ACCESS_TOKEN_EXPIRE, now + REFRESH_TOKEN_EXPIRE, user_id)
+            )
+            conn.commit()
+        return {"access_token": new_access, "refresh_token": new_refresh}
+
+#refresh endpoint
+@router.post("/refresh")
+@limiter.limit("10/minute")
+def refresh_tokens(request: Request, body: RefreshModel, conn=Depends(get_db)):
+    # The stored refresh token is the source of truth: one indexed lookup
+    # replaces the password check, so no argon2 work happens here.
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, admin, refresh_exp FROM users WHERE refresh_token=?", (body.refresh_token,))
+    row = cursor.fetchone()
+
+    if not row:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    user_id, admin, refresh_exp = row
+
+    now = int(time.time())
+    if refresh_exp is None or refresh_exp <= now:
+        raise HTTPException(status_code=401, detail="Refresh token expired")
+
+    # rotate both tokens; jti keeps the new refresh token distinct from the old one
+    new_access = create_token({"user_id": user_id, "admin": admin}, ACCESS_TOKEN_EXPIRE)
+    new_refresh = create_token({"user_id": user_id, "admin": admin, "jti": uuid.uuid4().hex}, REFRESH_TOKEN_EXPIRE)
+    with write_lock:
         cursor.execute(
-            "UPDATE users SET access_token=?, refresh_token=?, access_exp=?, refresh_exp=? WHERE id=?",
-            (new_access, new_refresh, now + ACCESS_TOKEN_EXPIRE, now + REFRESH_TOKEN_EXPIRE, user_id)
+            "UPDATE users SET access_token=?, refresh_token=?, access_exp=?, refresh_exp=? "
+            "WHERE id=? AND refresh_token=?",
+            (new_access, new_refresh, now + ACCESS_TOKEN_EXPIRE, now + REFRESH_TOKEN_EXPIRE,
+             user_id, body.refresh_token)
         )
+        rotated = cursor.rowcount
         conn.commit()
-        return {"access_token": new_access, "refresh_token": new_refresh}
+    if rotated != 1:
+        # a concurrent refresh already rotated this token
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
 
+    return {"access_token": new_access, "refresh_token": new_refresh}
@@ -0,0 +1,117 @@
+"""Multi-worker entry point for the MCP client API: ``python serve.py``.
+
+Uses gunicorn with uvicorn workers when gunicorn is installed: the app is
+imported once in the master and the workers are forked from it, each worker
+is replaced after MAX_REQUESTS requests, and SIGHUP restarts them gracefully.
+Otherwise uvicorn's multi-process mode is used. uvloop and httptools are
+picked up automatically when installed.
+
+Environment: MCP_CLIENT_PORT (8000), WEB_CONCURRENCY (usable cores),
+MAX_REQUESTS (10000, 0 = never), MAX_REQUESTS_JITTER (1000), KEEPALIVE (5 s),
+BACKLOG (2048), GRACEFUL_TIMEOUT (30 s), PRELOAD (1; 0 lets SIGHUP reload code).
+
+Workers share the SQLite database, which now also holds the linked MCP
+servers, so a /link handled by one worker is visible to all. Links persist
+across restarts until an admin removes them with DELETE /link/{name}; a
+server that went away makes every /ask fail until then. The headers given
+to /link (tokens included) are stored in plain text in db/users.db, so keep
+that file private. The admin user is created here, once, before the workers
+start.
+"""
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+from database import init_db
+from state import RATE_LIMIT_STORAGE_URI
+
+HOST = os.getenv("MCP_CLIENT_HOST", "0.0.0.0")
+PORT = int(os.getenv("MCP_CLIENT_PORT", 8000))
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", 10000))
+MAX_REQUESTS_JITTER = int(os.getenv("MAX_REQUESTS_JITTER", 1000))
+KEEPALIVE = int(os.getenv("KEEPALIVE", 5))
+BACKLOG = int(os.getenv("BACKLOG", 2048))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+PRELOAD = os.getenv("PRELOAD", "1") != "0"
+
+log = logging.getLogger("serve")
+
+
+def worker_count() -> int:
+    configured = int(os.getenv("WEB_CONCURRENCY", 0))
+    if configured > 0:
+        return configured
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS, Windows
+        return os.cpu_count() or 1
+
+
+def prepare(workers: int):
+    from mcp_client import bootstrap_admin
+
+    conn = init_db()
+    try:
+        bootstrap_admin(conn)
+    finally:
+        conn.close()
+    if workers > 1 and RATE_LIMIT_STORAGE_URI.startswith("memory://"):
+        log.warning("Rate limits are counted per worker (%d workers); set RATE_LIMIT_STORAGE_URI to share them.",
+                    workers)
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def _run_gunicorn(workers: int):
+    from gunicorn.app.base import BaseApplication
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        from uvicorn.workers import UvicornWorker
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{HOST}:{PORT}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", UvicornWorker)
+            self.cfg.set("preload_app", PRELOAD)
+            self.cfg.set("max_requests", MAX_REQUESTS)
+            self.cfg.set("max_requests_jitter", MAX_REQUESTS_JITTER)
+            self.cfg.set("keepalive", KEEPALIVE)
+            self.cfg.set("backlog", BACKLOG)
+            self.cfg.set("graceful_timeout", GRACEFUL_TIMEOUT)
+            # master, after binding and before forking
+            self.cfg.set("when_ready", lambda arbiter: prepare(workers))
+
+        def load(self):
+            from mcp_client import app
+            return app
+
+    Application().run()
+
+
+def _run_uvicorn(workers: int):
+    prepare(workers)
+    # recycling needs a manager process to start the replacement, i.e. more than one worker
+    max_requests = MAX_REQUESTS if workers > 1 and MAX_REQUESTS > 0 else None
+    uvicorn.run("mcp_client:app", host=HOST, port=PORT, workers=workers, limit_max_requests=max_requests,
+                timeout_keep_alive=KEEPALIVE, backlog=BACKLOG, timeout_graceful_shutdown=GRACEFUL_TIMEOUT)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    workers = worker_count()
+    log.info("%d workers, loop=%s, http=%s", workers, "uvloop" if _available("uvloop") else "asyncio",
+             "httptools" if _available("httptools") else "h11")
+    if _available("gunicorn"):
+        _run_gunicorn(workers)
+    else:
+        _run_uvicorn(workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
+import os
+
 from fastapi import Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"])
+# per process by default; serve.py workers only share limits through e.g. redis://host:6379
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+
+# RATE_LIMIT_ENABLED=0 turns rate limiting off, for benchmarks
+limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"],
+                  enabled=os.getenv("RATE_LIMIT_ENABLED", "1") != "0", storage_uri=RATE_LIMIT_STORAGE_URI)
 
 
 def get_db(request: Request):
@@ -0,0 +1,209 @@
+"""Latency/throughput benchmark for the Iris API endpoints, driven in-process.
+
+For every scale the user CSV is seeded with that many synthetic rows, then
+/add-data, /train and /predict are exercised through an ASGI client. Each
+run happens in a fresh temporary working directory.
+
+Usage (from ai/iris):
+    python benchmarks/load_test.py --rows 1000 100000 1000000 --json results.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import numpy as np
+from sklearn.datasets import load_iris
+
+IRIS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, IRIS_DIR)
+from training_cache import FEATURE_COLUMNS, LABEL_COLUMN  # noqa: E402
+
+
+class RssSampler:
+    """Samples the resident set size in a background thread and keeps the peak."""
+
+    def __init__(self, interval: float = 0.01):
+        self._interval = interval
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._stop = threading.Event()
+        self._thread = None
+        self.peak = 0
+
+    def _rss(self) -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page
+        except OSError:
+            # ru_maxrss is the lifetime peak (KiB on Linux, bytes on macOS)
+            scale = 1 if sys.platform == "darwin" else 1024
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop.wait(self._interval)
+
+    def __enter__(self):
+        self.peak = self._rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+
+def _percentile(sorted_ms, q: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    idx = min(len(sorted_ms) - 1, max(0, int(round(q * (len(sorted_ms) - 1)))))
+    return sorted_ms[idx]
+
+
+def _summary(latencies_ms, wall_s: float, peak_rss: int, errors: int) -> dict:
+    ordered = sorted(latencies_ms)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "p50_ms": round(_percentile(ordered, 0.50), 3),
+        "p95_ms": round(_percentile(ordered, 0.95), 3),
+        "p99_ms": round(_percentile(ordered, 0.99), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3) if ordered else 0.0,
+        "throughput_rps": round(len(ordered) / wall_s, 2) if wall_s > 0 else 0.0,
+        "peak_rss_mb": round(peak_rss / (1 << 20), 1),
+    }
+
+
+def synthetic_rows(n: int, seed: int) -> np.ndarray:
+    """Rows of ``[features..., label]`` drawn around the real per-class Iris means."""
+    iris = load_iris()
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, 3, size=n)
+    means = np.stack([iris.data[iris.target == c].mean(axis=0) for c in range(3)])
+    stds = np.stack([iris.data[iris.target == c].std(axis=0) for c in range(3)])
+    features = np.clip(rng.normal(means[labels], stds[labels]), 0.1, None)
+    return np.column_stack([features.round(2), labels])
+
+
+def seed_user_data(path: str, n: int, seed: int, columns):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rows = synthetic_rows(n, seed)
+    np.savetxt(path, rows, delimiter=",", fmt=["%.2f"] * (rows.shape[1] - 1) + ["%d"],
+               header=",".join(columns), comments="")
+
+
+async def _drive(client, method: str, url: str, payloads, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    queue = list(payloads)
+    queue.reverse()
+
+    async def worker():
+        nonlocal errors
+        while queue:
+            payload = queue.pop()
+            start = time.perf_counter()
+            resp = await client.request(method, url, json=payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if resp.status_code >= 400:
+                errors += 1
+
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        wall = time.perf_counter() - start
+    return _summary(latencies, wall, rss.peak, errors)
+
+
+async def run_scale(rows: int, args) -> dict:
+    previous_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix=f"iris-bench-{rows}-")
+    try:
+        os.chdir(workdir)
+
+        import iris
+        iris = importlib.reload(iris)
+        iris.MODEL_PARAMS["n_estimators"] = args.estimators
+
+        start = time.perf_counter()
+        seed_user_data(iris.USER_DATA_PATH, rows, args.seed, FEATURE_COLUMNS + [LABEL_COLUMN])
+        seed_s = time.perf_counter() - start
+
+        rng = np.random.default_rng(args.seed + 1)
+        samples = synthetic_rows(max(args.requests, 1), args.seed + 2)
+        add_payloads = [
+            {"sepal_length": r[0], "sepal_width": r[1], "petal_length": r[2], "petal_width": r[3], "label": int(r[4])}
+            for r in samples.tolist()
+        ]
+        predict_payloads = [
+            {k: v for k, v in p.items() if k != "label"}
+            for p in (add_payloads[i] for i in rng.integers(0, len(add_payloads), size=args.requests))
+        ]
+
+        transport = httpx.ASGITransport(app=iris.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://iris-bench", timeout=None) as client:
+            endpoints = {}
+            endpoints["add_data"] = await _drive(client, "POST", "/add-data", add_payloads, args.concurrency)
+            endpoints["train"] = await _drive(client, "POST", "/train", [None], 1)
+            endpoints["train_cached"] = await _drive(client, "POST", "/train", [None] * args.train_requests, 1)
+            endpoints["predict"] = await _drive(client, "POST", "/predict", predict_payloads, args.concurrency)
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"rows": rows, "seed_seconds": round(seed_s, 3), "endpoints": endpoints}
+
+
+def _print_run(run: dict):
+    print(f"\nrows={run['rows']}  (seeded in {run['seed_seconds']}s)")
+    print(f"{'endpoint':<14}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'RSS MB':>9}")
+    for name, s in run["endpoints"].items():
+        print(f"{name:<14}{s['requests']:>6}{s['errors']:>5}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}"
+              f"{s['p99_ms']:>10.2f}{s['throughput_rps']:>10.1f}{s['peak_rss_mb']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000],
+                        help="user_data.csv sizes to benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="requests per add-data/predict phase")
+    parser.add_argument("--train-requests", type=int, default=3,
+                        help="/train calls with unchanged data, after the one full retrain")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--estimators", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    runs = []
+    for rows in args.rows:
+        run = asyncio.run(run_scale(rows, args))
+        _print_run(run)
+        runs.append(run)
+
+    if args.json_path:
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k != "json_path"},
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "runs": runs,
+        }
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare save time, load time and file size of the ModelStore formats.
+
+Usage (from ai/iris):
+    python benchmarks/model_store.py [--estimators 100] [--rows 150] [--repeat 20] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_store import FORMATS, ModelStore  # noqa: E402
+
+
+def _train(estimators: int, rows: int):
+    iris = load_iris()
+    rng = np.random.default_rng(42)
+    idx = rng.integers(0, len(iris.target), size=rows)
+    X = iris.data[idx] + rng.normal(0, 0.05, size=(rows, iris.data.shape[1]))
+    model = RandomForestClassifier(n_estimators=estimators, random_state=42)
+    model.fit(X.astype(np.float32), iris.target[idx])
+    return model
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(estimators: int, rows: int, repeat: int) -> list:
+    model = _train(estimators, rows)
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        for fmt in FORMATS:
+            store = ModelStore(os.path.join(root, fmt), fmt)
+            start = time.perf_counter()
+            meta = store.save(model, data_version="bench", accuracy=0.0, training_seconds=0.0)
+            save_ms = (time.perf_counter() - start) * 1000
+            version = meta["version"]
+            results.append({
+                "format": fmt,
+                "mmap": False,
+                "size_bytes": meta["size_bytes"],
+                "save_ms": round(save_ms, 3),
+                "load_ms": round(_median_ms(lambda: store.load(version), repeat), 3),
+            })
+            if fmt == "joblib":
+                results.append({
+                    "format": fmt,
+                    "mmap": True,
+                    "size_bytes": meta["size_bytes"],
+                    "save_ms": round(save_ms, 3),
+                    "load_ms": round(_median_ms(lambda: store.load(version, mmap=True), repeat), 3),
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--estimators", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.estimators, args.rows, args.repeat)
+
+    print(f"{'format':<14}{'mmap':<6}{'size KiB':>10}{'save ms':>10}{'load ms':>10}")
+    for r in results:
+        print(f"{r['format']:<14}{str(r['mmap']):<6}{r['size_bytes'] / 1024:>10.1f}{r['save_ms']:>10.2f}{r['load_ms']:>10.2f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"estimators": args.estimators, "rows": args.rows, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
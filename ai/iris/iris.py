@@ -1,29 +1,61 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from sklearn.datasets import load_iris
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-import pandas as pd
-import joblib
+import csv
 import os
 import re
 import time
+import threading
+
+from training_cache import TrainingCache, FEATURE_COLUMNS, fingerprint
+from model_store import ModelStore, DEFAULT_FORMAT
+
 app = FastAPI(title="Iris Classification API")
 
 DATA_DIR = "data"
 MODEL_DIR = "model"
 USER_DATA_PATH = os.path.join(DATA_DIR, "user_data.csv")
-MODEL_PATH = os.path.join(MODEL_DIR, "iris_model.pkl")
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", DEFAULT_FORMAT)
 
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(MODEL_DIR, exist_ok=True)
 
-iris = load_iris()
-iris_df = pd.DataFrame(iris.data, columns=iris.feature_names)
-iris_df["label"] = iris.target
+# fixed by the dataset; load_iris() is only needed for the training data
+target_names = {0: "setosa", 1: "versicolor", 2: "virginica"}
+
+MODEL_PARAMS = {"n_estimators": 100, "random_state": 42, "test_size": 0.2}
+
+# sklearn (and with it scipy) takes a second or more to import, so the base
+# data set is only loaded by the first /train
+_training_cache = None
+_train_lock = threading.Lock()
+model_store = ModelStore(MODEL_DIR, MODEL_FORMAT)
+_serving_lock = threading.Lock()
+_serving = {"version": None, "model": None}
+# /add-data runs in the threadpool: the header check and the append must not interleave
+_user_data_lock = threading.Lock()
+
 
-target_names = dict(enumerate(iris.target_names))
+def _get_training_cache() -> TrainingCache:
+    """Iris base set plus user CSV; call with ``_train_lock`` held."""
+    global _training_cache
+    if _training_cache is None:
+        from sklearn.datasets import load_iris
+
+        iris = load_iris()
+        # feature_names are the FEATURE_COLUMNS, in the same order
+        _training_cache = TrainingCache(iris.data, iris.target, USER_DATA_PATH)
+    return _training_cache
+
+
+def _serving_model():
+    """Return the promoted model, reloading it only when the serving pointer moved."""
+    version = model_store.serving_version()
+    if version is None:
+        return None
+    with _serving_lock:
+        if _serving["version"] != version:
+            _serving.update(version=version, model=model_store.load(version))
+        return _serving["model"]
 
 class IrisData(BaseModel):
     sepal_length: float
@@ -58,21 +90,14 @@ def add_data(item: IrisData):
             detail=f"Invalid label format. Validation took {duration:.4f}s"
         )
 
-    new_row = pd.DataFrame([{
-        "sepal length (cm)": item.sepal_length,
-        "sepal width (cm)": item.sepal_width,
-        "petal length (cm)": item.petal_length,
-        "petal width (cm)": item.petal_width,
-        "label": item.label
-    }])
-
-    if os.path.exists(USER_DATA_PATH):
-        existing = pd.read_csv(USER_DATA_PATH)
-        df = pd.concat([existing, new_row], ignore_index=True)
-    else:
-        df = new_row
-
-    df.to_csv(USER_DATA_PATH, index=False)
+    # append-only, so the training cache only has to parse the new tail
+    with _user_data_lock:
+        write_header = not os.path.exists(USER_DATA_PATH)
+        with open(USER_DATA_PATH, "a", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            if write_header:
+                writer.writerow([*FEATURE_COLUMNS, "label"])
+            writer.writerow([item.sepal_length, item.sepal_width, item.petal_length, item.petal_width, item.label])
 
     return {
         "message": "Sample added successfully",
@@ -82,31 +107,84 @@ def add_data(item: IrisData):
 
 @app.post("/train")
 def train_model():
-    """Train a Random Forest on Iris + user data."""
-    df = iris_df.copy()
-    if os.path.exists(USER_DATA_PATH):
-        user_df = pd.read_csv(USER_DATA_PATH)
-        df = pd.concat([df, user_df], ignore_index=True)
+    """Train a Random Forest on Iris + user data.
+
+    Skips training when neither the data nor the hyperparameters changed
+    since the last run and returns the cached accuracy instead.
+    """
+    with _train_lock:
+        try:
+            X, y, data_version = _get_training_cache().refresh()
+        except ValueError as ex:
+            # the row stays unconsumed, so training resumes once the file is fixed
+            raise HTTPException(status_code=422, detail=f"Malformed row in {USER_DATA_PATH}: {ex}")
+        fp = fingerprint(data_version, MODEL_PARAMS)
+
+        serving = model_store.serving_metadata()
+        if serving and serving["fingerprint"] == fp:
+            return {
+                "message": "Model is up to date",
+                "accuracy": serving["accuracy"],
+                "data_version": data_version,
+                "version": serving["version"],
+                "cached": True,
+            }
+
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import accuracy_score
+        from sklearn.model_selection import train_test_split
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=MODEL_PARAMS["test_size"], random_state=MODEL_PARAMS["random_state"]
+        )
 
-    X = df.drop(columns=["label"])
-    y = df["label"]
+        model = RandomForestClassifier(
+            n_estimators=MODEL_PARAMS["n_estimators"], random_state=MODEL_PARAMS["random_state"]
+        )
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        training_seconds = time.perf_counter() - start
+        acc = accuracy_score(y_test, model.predict(X_test))
+
+        metadata = model_store.save(
+            model, data_version=data_version, accuracy=acc,
+            training_seconds=training_seconds, fingerprint=fp
+        )
+        model_store.promote(metadata["version"])
+        with _serving_lock:
+            _serving.update(version=metadata["version"], model=model)
+
+    return {
+        "message": "Model trained successfully",
+        "accuracy": acc,
+        "data_version": data_version,
+        "version": metadata["version"],
+        "cached": False,
+    }
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
-    acc = accuracy_score(y_test, model.predict(X_test))
+@app.get("/models")
+def list_models():
+    """List stored model versions and the one currently serving."""
+    return {"serving": model_store.serving_version(), "versions": model_store.versions()}
 
-    joblib.dump(model, MODEL_PATH)
-    return {"message": "Model trained successfully", "accuracy": acc}
+
+@app.post("/models/{version}/promote")
+def promote_model(version: int):
+    """Serve an earlier (or later) model version, e.g. to roll back."""
+    try:
+        model_store.promote(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found.")
+    return {"message": "Model promoted", "serving": version}
 
 
 @app.post("/predict")
 def predict(item: IrisPredict):
     """Predict Iris species."""
-    if not os.path.exists(MODEL_PATH):
+    model = _serving_model()
+    if model is None:
         raise HTTPException(status_code=400, detail="No trained model found. Train first.")
-    model = joblib.load(MODEL_PATH)
 
     X_input = [[
         item.sepal_length,
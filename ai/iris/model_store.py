@@ -0,0 +1,163 @@
+import json
+import os
+import pickle
+import re
+import tempfile
+import time
+
+# name -> (file name, dump kwargs)
+FORMATS = {
+    "joblib": ("model.joblib", {"compress": 0}),
+    "joblib-zlib": ("model.joblib.z", {"compress": ("zlib", 3)}),
+    "joblib-lzma": ("model.joblib.xz", {"compress": ("lzma", 3)}),
+    "pickle": ("model.pkl", None),
+}
+DEFAULT_FORMAT = "pickle"
+
+_VERSION_RX = re.compile(r"^v(\d+)$")
+_SERVING_FILE = "SERVING"
+_METADATA_FILE = "metadata.json"
+
+
+def _write_atomic(path: str, data: bytes):
+    # a unique temp file per call: a promote and a /train may write SERVING from two threads at once
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".tmp.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)  # mkstemp creates 0600
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class ModelStore:
+    """Numbered model versions on disk plus an atomically swapped "serving" pointer.
+
+    Layout::
+
+        <root>/v0001/model.pkl
+        <root>/v0001/metadata.json
+        <root>/SERVING              -> {"version": 1}
+
+    A version only becomes visible once its metadata is written, so readers
+    never see a half-written artifact.
+    """
+
+    def __init__(self, root: str, fmt: str = DEFAULT_FORMAT):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown model format '{fmt}'")
+        self.root = root
+        self.fmt = fmt
+        os.makedirs(root, exist_ok=True)
+
+    def _version_dir(self, version: int) -> str:
+        return os.path.join(self.root, f"v{version:04d}")
+
+    def _reserve_version(self) -> int:
+        version = max(self._version_numbers(), default=0) + 1
+        while True:
+            try:
+                os.mkdir(self._version_dir(version))
+                return version
+            except FileExistsError:
+                # another worker took this number
+                version += 1
+
+    def _version_numbers(self):
+        numbers = []
+        for name in os.listdir(self.root):
+            m = _VERSION_RX.match(name)
+            if m:
+                numbers.append(int(m.group(1)))
+        return numbers
+
+    def save(self, model, *, data_version: str, accuracy: float, training_seconds: float,
+             fingerprint: str = None, fmt: str = None) -> dict:
+        """Persist ``model`` as a new version and return its metadata."""
+        fmt = fmt or self.fmt
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown model format '{fmt}'")
+        file_name, dump_kwargs = FORMATS[fmt]
+
+        version = self._reserve_version()
+        path = os.path.join(self._version_dir(version), file_name)
+        if dump_kwargs is None:
+            with open(path, "wb") as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            import joblib  # only the joblib formats need it, and it is slow to import
+
+            joblib.dump(model, path, **dump_kwargs)
+
+        metadata = {
+            "version": version,
+            "format": fmt,
+            "file": file_name,
+            "data_version": data_version,
+            "fingerprint": fingerprint,
+            "accuracy": accuracy,
+            "training_seconds": round(training_seconds, 6),
+            "trained_at": int(time.time()),
+            "size_bytes": os.path.getsize(path),
+        }
+        _write_atomic(os.path.join(self._version_dir(version), _METADATA_FILE),
+                      json.dumps(metadata, indent=2).encode())
+        return metadata
+
+    def metadata(self, version: int) -> dict:
+        path = os.path.join(self._version_dir(version), _METADATA_FILE)
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(version)
+
+    def versions(self) -> list:
+        """Metadata of every complete version, oldest first."""
+        out = []
+        for version in sorted(self._version_numbers()):
+            try:
+                out.append(self.metadata(version))
+            except KeyError:
+                continue  # still being written, or an aborted save
+        return out
+
+    def load(self, version: int, mmap: bool = False):
+        """Load a stored model. ``mmap`` maps numpy arrays of uncompressed joblib files read-only."""
+        metadata = self.metadata(version)
+        path = os.path.join(self._version_dir(version), metadata["file"])
+        if metadata["format"] == "pickle":
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        import joblib
+
+        mmap_mode = "r" if mmap and metadata["format"] == "joblib" else None
+        return joblib.load(path, mmap_mode=mmap_mode)
+
+    def promote(self, version: int):
+        """Point "serving" at ``version``; readers see either the old or the new pointer."""
+        self.metadata(version)
+        _write_atomic(os.path.join(self.root, _SERVING_FILE), json.dumps({"version": version}).encode())
+
+    def serving_version(self):
+        try:
+            with open(os.path.join(self.root, _SERVING_FILE), "r") as f:
+                return json.load(f)["version"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def serving_metadata(self):
+        version = self.serving_version()
+        if version is None:
+            return None
+        try:
+            return self.metadata(version)
+        except KeyError:
+            return None
@@ -0,0 +1,127 @@
+import hashlib
+import io
+import json
+import os
+import threading
+
+import numpy as np
+
+FEATURE_COLUMNS = [
+    "sepal length (cm)",
+    "sepal width (cm)",
+    "petal length (cm)",
+    "petal width (cm)",
+]
+LABEL_COLUMN = "label"
+
+_INITIAL_CAPACITY = 1024
+
+
+class TrainingCache:
+    """Columnar float32 training matrix built from the Iris base set plus the user CSV.
+
+    The user CSV is append-only, so only the bytes written since the last
+    refresh are parsed. If the file shrinks or is replaced the cache is
+    rebuilt from scratch. The data version is derived from the file itself
+    (inode, bytes ingested and their running sha256), so it stays valid
+    across restarts and changes whenever the ingested content does.
+    """
+
+    def __init__(self, base_X, base_y, csv_path: str):
+        self._csv_path = csv_path
+        self._base_X = np.asarray(base_X, dtype=np.float32)
+        self._base_y = np.asarray(base_y, dtype=np.int64)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        n = len(self._base_y)
+        capacity = max(_INITIAL_CAPACITY, 2 * n)
+        # one row per feature: tree splitters scan a feature at a time
+        self._X = np.empty((len(FEATURE_COLUMNS), capacity), dtype=np.float32)
+        self._y = np.empty(capacity, dtype=np.int64)
+        self._X[:, :n] = self._base_X.T
+        self._y[:n] = self._base_y
+        self._n = n
+        self._user_rows = 0
+        self._offset = 0
+        self._inode = None
+        self._digest = hashlib.sha256()
+
+    def _grow(self, needed: int):
+        capacity = self._y.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        X = np.empty((self._X.shape[0], capacity), dtype=np.float32)
+        X[:, :self._n] = self._X[:, :self._n]
+        y = np.empty(capacity, dtype=np.int64)
+        y[:self._n] = self._y[:self._n]
+        self._X, self._y = X, y
+
+    def _append(self, rows: np.ndarray):
+        count = rows.shape[0]
+        if count == 0:
+            return
+        self._grow(self._n + count)
+        end = self._n + count
+        self._X[:, self._n:end] = rows[:, :len(FEATURE_COLUMNS)].T
+        self._y[self._n:end] = rows[:, len(FEATURE_COLUMNS)]
+        self._n = end
+        self._user_rows += count
+
+    def _read_new_rows(self):
+        try:
+            st = os.stat(self._csv_path)
+        except FileNotFoundError:
+            if self._user_rows or self._offset:
+                self._reset()
+            return
+
+        if self._inode is not None and (st.st_ino != self._inode or st.st_size < self._offset):
+            self._reset()
+        self._inode = st.st_ino
+
+        if st.st_size == self._offset:
+            return
+
+        with open(self._csv_path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(st.st_size - self._offset)
+
+        # a writer may be mid-row; leave the partial line for the next refresh
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return
+        consumed = chunk[:end]
+        if self._offset == 0:
+            consumed = consumed.split(b"\n", 1)[1]
+
+        if consumed.strip():
+            # raises on a malformed line before anything moves, so the chunk is retried, not lost
+            rows = np.loadtxt(io.BytesIO(consumed), delimiter=",", dtype=np.float64, ndmin=2)
+            self._append(rows)
+        self._digest.update(chunk[:end])
+        self._offset += end
+
+    def refresh(self):
+        """Ingest rows appended since the last call and return ``(X, y, data_version)``.
+
+        ``X`` is a ``(n_samples, n_features)`` float32 view in which every
+        feature column is contiguous, ``y`` holds the matching labels; both
+        are only valid until the next refresh.
+        """
+        with self._lock:
+            self._read_new_rows()
+            return self._X[:, :self._n].T, self._y[:self._n], self.data_version
+
+    @property
+    def data_version(self) -> str:
+        return f"{self._inode or 0}:{self._offset}:{self._digest.hexdigest()}"
+
+
+def fingerprint(data_version: str, params: dict) -> str:
+    """Stable hash of the training inputs; equal fingerprints mean an identical model."""
+    payload = json.dumps({"data_version": data_version, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
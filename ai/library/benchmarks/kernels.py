@@ -0,0 +1,230 @@
+"""Per-kernel throughput of the native library across compiler build variants.
+
+Compiles mlops.c once per variant (-O0 -g, -O2, -O3 -march=native, ASan) into
+a scratch directory, then times matmul, relu_inplace, softmax, copy_weights
+and save/load_model_raw in a fresh interpreter per build, next to the NumPy
+equivalent and the bare cost of a ctypes call. Matmul is reported in GFLOP/s,
+everything else in GB/s of memory traffic (bytes read + written).
+
+Usage (from ai/library):
+    python benchmarks/kernels.py [--variants O0 O2 O3-native asan] [--sizes 1000 100000 1000000]
+                                 [--matmul-sizes 64 256] [--lib ./libmlops_ml.so] [--json out.json]
+"""
+import argparse
+import ctypes as ct
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+LIBRARY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(LIBRARY_DIR, "mlops.c")
+
+COMMON_FLAGS = ["-fPIC", "-shared", "-pthread"]
+VARIANTS = {
+    "O0": ["-O0", "-g"],
+    "O2": ["-O2"],
+    "O3-native": ["-O3", "-march=native"],
+    "asan": ["-O1", "-g", "-fsanitize=address", "-fno-omit-frame-pointer"],
+}
+
+sys.path.insert(0, LIBRARY_DIR)
+import bindings  # noqa: E402
+
+
+def build(variant: str, out_dir: str, cc: str) -> str:
+    path = os.path.join(out_dir, f"libmlops_{variant}.so")
+    cmd = [cc, *VARIANTS[variant], *COMMON_FLAGS, SOURCE, "-o", path, "-lm"]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def _seconds(fn, repeat: int, min_time: float = 0.02) -> float:
+    """Best per-call time over ``repeat`` rounds, each long enough to be measurable."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _row(kernel: str, size: int, native_s: float, numpy_s: float, work: float, unit: str) -> dict:
+    return {
+        "kernel": kernel,
+        "size": size,
+        "unit": unit,
+        "native": work / native_s / 1e9,
+        "numpy": work / numpy_s / 1e9 if numpy_s else None,
+        "native_us": native_s * 1e6,
+    }
+
+
+def _np_softmax(x, out):
+    np.subtract(x, x.max(), out=out)
+    np.exp(out, out=out)
+    out /= out.sum()
+
+
+def run_worker(sizes, matmul_sizes, repeat: int) -> list:
+    lib = bindings.load()  # the build under test, from MLOPS_LIB
+    rng = np.random.default_rng(0)
+    rows = []
+
+    for n in matmul_sizes:
+        A = rng.standard_normal((n, n))
+        B = rng.standard_normal((n, n))
+        C = np.empty((n, n))
+        pa, pb, pc = bindings.np_ptr(A), bindings.np_ptr(B), bindings.np_ptr(C)
+        flops = 2.0 * n ** 3
+        numpy_s = _seconds(lambda: np.matmul(A, B, out=C), repeat)
+        rows.append(_row("matmul", n, _seconds(lambda: lib.matmul(pa, pb, pc, n, n, n), repeat),
+                         numpy_s, flops, "GFLOP/s"))
+        rows.append(_row("matmul_blocked", n, _seconds(lambda: lib.matmul_blocked(pa, pb, pc, n, n, n), repeat),
+                         numpy_s, flops, "GFLOP/s"))
+
+    workdir = tempfile.mkdtemp(prefix="mlops-bench-")
+    previous = os.getcwd()
+    os.chdir(workdir)  # save/load_model_raw only accept relative base paths
+    try:
+        for n in sizes:
+            x = rng.standard_normal(n)
+            y = np.empty(n)
+            px, py = bindings.np_ptr(x), bindings.np_ptr(y)
+            traffic = 16.0 * n  # one double read and one written per element
+
+            rows.append(_row("relu_inplace", n, _seconds(lambda: lib.relu_inplace(py, n), repeat),
+                             _seconds(lambda: np.maximum(y, 0.0, out=y), repeat), traffic, "GB/s"))
+            rows.append(_row("softmax", n, _seconds(lambda: lib.softmax(px, n, py), repeat),
+                             _seconds(lambda: _np_softmax(x, y), repeat), traffic, "GB/s"))
+            rows.append(_row("copy_weights", n, _seconds(lambda: lib.copy_weights(n, px, py), repeat),
+                             _seconds(lambda: np.copyto(y, x), repeat), traffic, "GB/s"))
+
+            count = ct.c_int()
+
+            def save():
+                if lib.save_model_raw(b".", px, n) != 0:
+                    raise RuntimeError("save_model_raw failed")
+
+            def load():
+                p = lib.load_model_raw(b".", ct.byref(count))
+                if not p:
+                    raise RuntimeError("load_model_raw failed")
+                lib.c_free_model(p)
+
+            rows.append(_row("save_model_raw", n, _seconds(save, repeat),
+                             _seconds(lambda: x.tofile("numpy.bin"), repeat), 8.0 * n, "GB/s"))
+            rows.append(_row("load_model_raw", n, _seconds(load, repeat),
+                             _seconds(lambda: np.fromfile("numpy.bin"), repeat), 8.0 * n, "GB/s"))
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # fixed cost of crossing into C: an empty relu through each calling path
+    one = np.zeros(1)
+    p1 = bindings.np_ptr(one)
+    addr = bindings.address(one)
+    relu_fast = bindings.fast("relu_inplace")
+    rows.append({"kernel": "ctypes_call", "size": 0, "unit": "us/call",
+                 "native_us": _seconds(lambda: lib.relu_inplace(p1, 0), repeat) * 1e6,
+                 "numpy_us": _seconds(lambda: np.maximum(one, 0.0, out=one), repeat) * 1e6})
+    rows.append({"kernel": "ctypes_call+np_ptr", "size": 0, "unit": "us/call",
+                 "native_us": _seconds(lambda: lib.relu_inplace(bindings.np_ptr(one), 0), repeat) * 1e6,
+                 "numpy_us": None})
+    rows.append({"kernel": "fast_call", "size": 0, "unit": "us/call",
+                 "native_us": _seconds(lambda: relu_fast(addr, 0), repeat) * 1e6,
+                 "numpy_us": None})
+    return rows
+
+
+def _run_variant(variant: str, lib_path: str, args) -> list:
+    env = dict(os.environ, MLOPS_LIB=lib_path)
+    if variant == "asan":
+        # the interpreter itself is not instrumented, so the runtime has to be preloaded
+        runtime = subprocess.run([args.cc, "-print-file-name=libasan.so"], capture_output=True, text=True,
+                                 check=True).stdout.strip()
+        env["LD_PRELOAD"] = runtime
+        env["ASAN_OPTIONS"] = "detect_leaks=0"
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--repeat", str(args.repeat),
+           "--sizes", *map(str, args.sizes), "--matmul-sizes", *map(str, args.matmul_sizes)]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{variant} run failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _print_variant(variant: str, rows):
+    print(f"\n[{variant}]")
+    print(f"{'kernel':<20}{'size':>10}{'native':>10}{'numpy':>10}{'us/call':>12}  unit")
+    for r in rows:
+        if r["unit"] == "us/call":
+            numpy_us = f"{r['numpy_us']:>10.3f}" if r["numpy_us"] is not None else f"{'-':>10}"
+            print(f"{r['kernel']:<20}{'':>10}{'':>10}{numpy_us}{r['native_us']:>12.3f}  us/call")
+            continue
+        numpy_col = f"{r['numpy']:>10.2f}" if r["numpy"] is not None else f"{'-':>10}"
+        print(f"{r['kernel']:<20}{r['size']:>10}{r['native']:>10.2f}{numpy_col}{r['native_us']:>12.1f}  "
+              f"{r['unit']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=["O0", "O2", "O3-native", "asan"])
+    parser.add_argument("--lib", help="benchmark this already-built library instead of compiling variants")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="element counts for the vector kernels and save/load")
+    parser.add_argument("--matmul-sizes", type=int, nargs="+", default=[64, 256])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cc", default=os.getenv("CC", "gcc"))
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.sizes, args.matmul_sizes, args.repeat)))
+        return
+
+    results = {}
+    if args.lib:
+        results["prebuilt"] = _run_variant("prebuilt", os.path.abspath(args.lib), args)
+        _print_variant("prebuilt", results["prebuilt"])
+    else:
+        build_dir = tempfile.mkdtemp(prefix="mlops-build-")
+        try:
+            for variant in args.variants:
+                results[variant] = _run_variant(variant, build(variant, build_dir, args.cc), args)
+                _print_variant(variant, results[variant])
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    if args.json_path:
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k not in ("json_path", "worker")},
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "flags": {v: VARIANTS[v] + COMMON_FLAGS for v in args.variants},
+            "results": results,
+        }
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Naive vs blocked vs multithreaded native matmul, against numpy.matmul.
+
+Build the library first (see README), then from ai/library:
+    python benchmarks/matmul.py [--sizes 64 128 256 512 1024] [--threads 0] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mlops  # noqa: E402
+from bindings import lib, np_ptr  # noqa: E402
+
+
+def _best_seconds(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128, 256, 512, 1024])
+    parser.add_argument("--threads", type=int, default=0, help="threads for the mt kernel, 0 = one per CPU")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--naive-max", type=int, default=512, help="skip the naive kernel above this size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'n':>6}{'naive':>10}{'blocked':>10}{'mt':>10}{'numpy':>10}   GFLOP/s")
+    for n in args.sizes:
+        A = rng.standard_normal((n, n))
+        B = rng.standard_normal((n, n))
+        C = np.empty((n, n))
+        expected = A @ B
+        if not np.allclose(mlops.matmul(A, B), expected) or not np.allclose(
+                mlops.matmul(A, B, threads=args.threads), expected):
+            raise SystemExit(f"native matmul disagrees with numpy at n={n}")
+
+        flops = 2.0 * n ** 3
+        cols = []
+        if n <= args.naive_max:
+            t = _best_seconds(lambda: lib.matmul(np_ptr(A), np_ptr(B), np_ptr(C), n, n, n), args.repeat)
+            cols.append(flops / t / 1e9)
+        else:
+            cols.append(None)
+        cols.append(flops / _best_seconds(lambda: mlops.matmul(A, B, out=C), args.repeat) / 1e9)
+        cols.append(flops / _best_seconds(lambda: mlops.matmul(A, B, out=C, threads=args.threads), args.repeat) / 1e9)
+        cols.append(flops / _best_seconds(lambda: np.matmul(A, B, out=C), args.repeat) / 1e9)
+        print(f"{n:>6}" + "".join(f"{c:>10.2f}" if c is not None else f"{'-':>10}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
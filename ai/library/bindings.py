@@ -0,0 +1,148 @@
+"""ctypes bindings for the mlops native library, loaded on first use.
+
+Nothing is loaded at import time. The first attribute access on ``lib``
+loads the shared library from this module's directory (or from ``MLOPS_LIB``),
+declares every signature in ``SIGNATURES`` once, and caches the function on
+``lib`` so later lookups are plain attribute reads.
+
+``fast(name)`` returns the same function with every pointer parameter typed
+as ``void *``, to be called with raw integer addresses (see ``address``).
+This skips ctypes' pointer conversion, which costs more than a small kernel:
+compute the addresses once outside a tight loop and pass them in.
+"""
+import ctypes as ct
+import os
+import threading
+
+import numpy as np
+
+LIBRARY_DIR = os.path.dirname(os.path.abspath(__file__))
+# an ASan build next to the module wins, as it is only there when deliberately built
+LIBRARY_NAMES = ("libmlops_ml_asan.so", "libmlops_ml.so")
+
+WEIGHTS_MAX_DIMS = 8
+
+_DOUBLE_P = ct.POINTER(ct.c_double)
+_UINT64_P = ct.POINTER(ct.c_uint64)
+
+
+class WeightsHeader(ct.Structure):
+    _fields_ = [
+        ("magic", ct.c_char * 8),
+        ("version", ct.c_uint32),
+        ("dtype", ct.c_uint32),
+        ("ndim", ct.c_uint32),
+        ("reserved", ct.c_uint32),
+        ("shape", ct.c_uint64 * WEIGHTS_MAX_DIMS),
+        ("data_offset", ct.c_uint64),
+        ("data_bytes", ct.c_uint64),
+    ]
+
+
+# name: (restype, argtypes). Functions returning malloc'ed memory are declared
+# c_void_p so the pointer survives for c_free_model.
+SIGNATURES = {
+    "matmul": (None, [_DOUBLE_P, _DOUBLE_P, _DOUBLE_P, ct.c_size_t, ct.c_size_t, ct.c_size_t]),
+    "matmul_blocked": (None, [_DOUBLE_P, _DOUBLE_P, _DOUBLE_P, ct.c_size_t, ct.c_size_t, ct.c_size_t]),
+    "matmul_blocked_mt": (ct.c_int, [_DOUBLE_P, _DOUBLE_P, _DOUBLE_P, ct.c_size_t, ct.c_size_t, ct.c_size_t,
+                                     ct.c_int]),
+    "relu_inplace": (None, [_DOUBLE_P, ct.c_size_t]),
+    "softmax": (ct.c_int, [_DOUBLE_P, ct.c_size_t, _DOUBLE_P]),
+    "softmax_rows": (ct.c_int, [_DOUBLE_P, ct.c_size_t, ct.c_size_t, _DOUBLE_P]),
+    "softmax_to_fixedbuf": (None, [_DOUBLE_P, ct.c_size_t, ct.c_char_p, ct.c_size_t]),
+    "dense_forward": (ct.c_int, [_DOUBLE_P, _DOUBLE_P, _DOUBLE_P, _DOUBLE_P, ct.c_size_t, ct.c_size_t,
+                                 ct.c_size_t, ct.c_int]),
+    "save_model_raw": (ct.c_int, [ct.c_char_p, _DOUBLE_P, ct.c_int]),
+    "load_model_raw": (_DOUBLE_P, [ct.c_char_p, ct.POINTER(ct.c_int)]),
+    "c_free_model": (None, [ct.c_void_p]),
+    "alloc_weights": (_DOUBLE_P, [ct.c_int]),
+    "copy_weights": (None, [ct.c_int, _DOUBLE_P, _DOUBLE_P]),
+    "get_system_info": (ct.c_void_p, []),
+    "get_gpu_info": (ct.c_void_p, []),
+    "save_weights_mappable": (ct.c_int, [ct.c_char_p, ct.c_void_p, ct.c_uint32, ct.c_uint32, _UINT64_P]),
+    "map_weights": (ct.c_void_p, [ct.c_char_p, ct.POINTER(WeightsHeader), ct.POINTER(ct.c_size_t)]),
+    "unmap_weights": (None, [ct.c_void_p, ct.c_size_t]),
+    "ckpt_open_write": (ct.c_void_p, [ct.c_char_p]),
+    "ckpt_begin_tensor": (ct.c_int, [ct.c_void_p, ct.c_char_p, ct.c_uint32, ct.c_uint32, _UINT64_P]),
+    "ckpt_write_chunk": (ct.c_int, [ct.c_void_p, ct.c_void_p, ct.c_uint64]),
+    "ckpt_end_tensor": (ct.c_int, [ct.c_void_p]),
+    "ckpt_commit": (ct.c_int, [ct.c_void_p]),
+    "ckpt_abort": (None, [ct.c_void_p]),
+    "ckpt_open_read": (ct.c_void_p, [ct.c_char_p]),
+    "ckpt_next_tensor": (ct.c_int, [ct.c_void_p, ct.c_char_p, ct.c_size_t, ct.POINTER(ct.c_uint32),
+                                    ct.POINTER(ct.c_uint32), _UINT64_P]),
+    "ckpt_read": (ct.c_int64, [ct.c_void_p, ct.c_void_p, ct.c_uint64]),
+    "ckpt_close_read": (None, [ct.c_void_p]),
+}
+
+_load_lock = threading.Lock()
+_cdll = None
+
+
+def library_path() -> str:
+    """``MLOPS_LIB`` if set, otherwise the first of ``LIBRARY_NAMES`` present next to this module."""
+    override = os.getenv("MLOPS_LIB")
+    if override:
+        return os.path.abspath(override)
+    for name in LIBRARY_NAMES:
+        path = os.path.join(LIBRARY_DIR, name)
+        if os.path.exists(path):
+            return path
+    return os.path.join(LIBRARY_DIR, LIBRARY_NAMES[-1])
+
+
+def load() -> ct.CDLL:
+    """Load the library and declare its signatures, once per process."""
+    global _cdll
+    if _cdll is None:
+        with _load_lock:
+            if _cdll is None:
+                cdll = ct.CDLL(library_path())
+                for name, (restype, argtypes) in SIGNATURES.items():
+                    fn = getattr(cdll, name)
+                    fn.restype = restype
+                    fn.argtypes = argtypes
+                _cdll = cdll
+    return _cdll
+
+
+class _LazyLibrary:
+    def __getattr__(self, name):
+        fn = getattr(load(), name)
+        # cached on the instance, so __getattr__ only runs on the first lookup
+        setattr(self, name, fn)
+        return fn
+
+
+lib = _LazyLibrary()
+
+
+def _raw(t):
+    return ct.c_void_p if t is not None and issubclass(t, (ct._Pointer, ct.c_char_p)) else t
+
+
+_fast_cache = {}
+
+
+def fast(name: str):
+    """``name`` with pointer parameters (and results) taken as plain integers.
+
+    Measured with an empty relu_inplace (benchmarks/kernels.py, -O2 build):
+    ~0.5 us per call, against ~0.7 us for the declared function with a
+    prebuilt pointer and ~3.5 us when np_ptr runs on every call.
+    """
+    fn = _fast_cache.get(name)
+    if fn is None:
+        restype, argtypes = SIGNATURES[name]
+        proto = ct.CFUNCTYPE(_raw(restype), *(_raw(t) for t in argtypes))
+        fn = _fast_cache.setdefault(name, proto((name, load())))
+    return fn
+
+
+def np_ptr(arr: np.ndarray):
+    return arr.ctypes.data_as(_DOUBLE_P)
+
+
+def address(arr: np.ndarray) -> int:
+    """Address of ``arr``'s first element, for functions returned by ``fast``."""
+    return arr.ctypes.data
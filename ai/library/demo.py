@@ -1,49 +1,11 @@
 import ctypes as ct
 import numpy as np
-import os, sys
+import os
 
-LIBNAME = "libmlops_ml_asan.so" if os.path.exists("libmlops_ml_asan.so") else "libmlops_ml.so"
-lib = ct.cdll.LoadLibrary(os.path.join(os.path.dirname(__file__), LIBNAME))
-print("Loaded", LIBNAME)
-
-lib.matmul.argtypes = [
-    ct.POINTER(ct.c_double), ct.POINTER(ct.c_double), ct.POINTER(ct.c_double),
-    ct.c_size_t, ct.c_size_t, ct.c_size_t
-]
-lib.matmul.restype = None
-
-lib.relu_inplace.argtypes = [ct.POINTER(ct.c_double), ct.c_size_t]
-lib.relu_inplace.restype = None
-
-# updated signature: out buffer and its capacity
-lib.softmax_to_fixedbuf.argtypes = [ct.POINTER(ct.c_double), ct.c_size_t, ct.c_char_p, ct.c_size_t]
-lib.softmax_to_fixedbuf.restype = None
-
-lib.save_model_raw.argtypes = [ct.c_char_p, ct.POINTER(ct.c_double), ct.c_int]
-lib.save_model_raw.restype = ct.c_int
-
-lib.load_model_raw.argtypes = [ct.c_char_p, ct.POINTER(ct.c_int)]
-lib.load_model_raw.restype = ct.POINTER(ct.c_double)
-
-lib.c_free_model.argtypes = [ct.c_void_p]
-lib.c_free_model.restype = None
-
-lib.alloc_weights.argtypes = [ct.c_int]
-lib.alloc_weights.restype = ct.POINTER(ct.c_double)
-
-lib.copy_weights.argtypes = [ct.c_int, ct.POINTER(ct.c_double), ct.POINTER(ct.c_double)]
-lib.copy_weights.restype = None
-
-# system info functions
-lib.get_system_info.argtypes = []
-lib.get_system_info.restype = ct.c_char_p
-lib.get_gpu_info.argtypes = []
-lib.get_gpu_info.restype = ct.c_char_p
-
-def np_ptr(arr: np.ndarray):
-    return arr.ctypes.data_as(ct.POINTER(ct.c_double))
+from bindings import lib, library_path, np_ptr
 
 if __name__ == "__main__":
+    print("Loaded", os.path.basename(library_path()))
     A = np.ascontiguousarray([[1.,2.,3.],[4.,5.,6.]], dtype=np.float64)
     B = np.ascontiguousarray([[7.,8.],[9.,10.],[11.,12.]], dtype=np.float64)
     C = np.zeros((2,2), dtype=np.float64)
@@ -62,14 +24,14 @@ if __name__ == "__main__":
     # system info (returns malloc'ed pointer, free with c_free_model)
     s = lib.get_system_info()
     if s:
-        print("system:", s.decode() if isinstance(s, bytes) else s)
+        print("system:", ct.string_at(s).decode(errors="replace"))
         lib.c_free_model(s)
     else:
         print("system info unavailable")
 
     g = lib.get_gpu_info()
     if g:
-        print("gpu:", g.decode() if isinstance(g, bytes) else g)
+        print("gpu:", ct.string_at(g).decode(errors="replace").strip())
         lib.c_free_model(g)
     else:
         print("gpu info unavailable")
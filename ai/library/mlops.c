@@ -10,6 +10,8 @@
 #include <sys/stat.h>
 #include <sys/types.h>
 #include <sys/utsname.h>
+#include <sys/mman.h>
+#include <pthread.h>
 
 #ifdef __cplusplus
 extern "C" {
@@ -49,6 +51,110 @@ void matmul(const double *A, const double *B, double *C,
     }
 }
 
+/* Tile sizes for matmul_blocked: an A tile row, a BLOCK_K x BLOCK_N tile of B
+   and the matching row of C stay resident in L1/L2 while they are reused. */
+#define MM_BLOCK_M 64
+#define MM_BLOCK_K 128
+#define MM_BLOCK_N 256
+
+static size_t min_size(size_t a, size_t b) { return a < b ? a : b; }
+
+/* C[m0:m1, :] = A[m0:m1, :] @ B, walking B row-wise so the inner loop is
+   unit-stride over both B and C (and vectorizes). */
+static void matmul_rows(const double *restrict A, const double *restrict B, double *restrict C,
+                        size_t m0, size_t m1, size_t k, size_t n) {
+    for (size_t i = m0; i < m1; ++i) memset(C + i * n, 0, n * sizeof(double));
+    for (size_t i0 = m0; i0 < m1; i0 += MM_BLOCK_M) {
+        size_t i1 = min_size(i0 + MM_BLOCK_M, m1);
+        for (size_t p0 = 0; p0 < k; p0 += MM_BLOCK_K) {
+            size_t p1 = min_size(p0 + MM_BLOCK_K, k);
+            for (size_t j0 = 0; j0 < n; j0 += MM_BLOCK_N) {
+                size_t j1 = min_size(j0 + MM_BLOCK_N, n);
+                for (size_t i = i0; i < i1; ++i) {
+                    double *restrict c = C + i * n;
+                    const double *restrict a = A + i * k;
+                    for (size_t p = p0; p < p1; ++p) {
+                        const double aip = a[p];
+                        const double *restrict b = B + p * n;
+                        for (size_t j = j0; j < j1; ++j) c[j] += aip * b[j];
+                    }
+                }
+            }
+        }
+    }
+}
+
+/* Cache-blocked C = A @ B for row-major A (m x k), B (k x n), C (m x n). */
+void matmul_blocked(const double *A, const double *B, double *C,
+                    size_t m, size_t k, size_t n) {
+    if (!A || !B || !C) return;
+    if (m == 0 || k == 0 || n == 0) return;
+    matmul_rows(A, B, C, 0, m, k, n);
+}
+
+typedef struct {
+    const double *A, *B;
+    double *C;
+    size_t m0, m1, k, n;
+    int spawned;
+} matmul_job;
+
+static void *matmul_worker(void *arg) {
+    matmul_job *job = (matmul_job *)arg;
+    matmul_rows(job->A, job->B, job->C, job->m0, job->m1, job->k, job->n);
+    return NULL;
+}
+
+/* matmul_blocked with the rows of C split across nthreads pthreads
+   (nthreads <= 0 means one per online CPU). Returns 0, or -1 on bad input. */
+int matmul_blocked_mt(const double *A, const double *B, double *C,
+                      size_t m, size_t k, size_t n, int nthreads) {
+    if (!A || !B || !C) return -1;
+    if (m == 0 || k == 0 || n == 0) return 0;
+    if (nthreads <= 0) {
+        long cpus = sysconf(_SC_NPROCESSORS_ONLN);
+        nthreads = cpus > 0 ? (int)cpus : 1;
+    }
+    /* never hand a thread less than one row tile */
+    size_t max_threads = (m + MM_BLOCK_M - 1) / MM_BLOCK_M;
+    if ((size_t)nthreads > max_threads) nthreads = (int)max_threads;
+    if (nthreads <= 1) {
+        matmul_rows(A, B, C, 0, m, k, n);
+        return 0;
+    }
+
+    pthread_t *threads = (pthread_t *)malloc((size_t)nthreads * sizeof(pthread_t));
+    matmul_job *jobs = (matmul_job *)malloc((size_t)nthreads * sizeof(matmul_job));
+    if (!threads || !jobs) {
+        free(threads);
+        free(jobs);
+        matmul_rows(A, B, C, 0, m, k, n);
+        return 0;
+    }
+
+    size_t tiles = max_threads;
+    size_t row = 0;
+    for (int t = 0; t < nthreads; ++t) {
+        /* spread whole row tiles as evenly as possible */
+        size_t my_tiles = tiles / (size_t)nthreads + ((size_t)t < tiles % (size_t)nthreads ? 1 : 0);
+        size_t end = min_size(row + my_tiles * MM_BLOCK_M, m);
+        jobs[t] = (matmul_job){A, B, C, row, end, k, n, 0};
+        row = end;
+        if (t < nthreads - 1 && pthread_create(&threads[t], NULL, matmul_worker, &jobs[t]) == 0) {
+            jobs[t].spawned = 1;
+        } else {
+            /* last slice (or a failed spawn) runs on the calling thread */
+            matmul_rows(A, B, C, jobs[t].m0, jobs[t].m1, k, n);
+        }
+    }
+    for (int t = 0; t < nthreads; ++t) {
+        if (jobs[t].spawned) pthread_join(threads[t], NULL);
+    }
+    free(threads);
+    free(jobs);
+    return 0;
+}
+
 void relu_inplace(double *x, size_t n) {
     if (!x) return;
     for (size_t i = 0; i < n; ++i) {
@@ -57,30 +163,84 @@ void relu_inplace(double *x, size_t n) {
     }
 }
 
-/* softmax -> out buffer with capacity to avoid fixed-buffer overflow */
-void softmax_to_fixedbuf(const double *x, size_t n, char *out, size_t out_cap) {
-    if (!x || !out || out_cap == 0) return;
+/* Numerically stable softmax of x[0..n) into out[0..n); out may be x itself.
+   No allocation. Returns 0, or -1 on bad input. */
+int softmax(const double *x, size_t n, double *out) {
+    if (!x || !out || n == 0) return -1;
     double maxv = x[0];
     for (size_t i = 1; i < n; ++i) if (x[i] > maxv) maxv = x[i];
     double sum = 0.0;
-    double *tmp = (double*) malloc(n * sizeof(double));
-    if (!tmp) {
-        out[0] = '\0';
-        return;
-    }
     for (size_t i = 0; i < n; ++i) {
-        tmp[i] = exp(x[i] - maxv);
-        sum += tmp[i];
+        out[i] = exp(x[i] - maxv);
+        sum += out[i];
     }
     if (sum == 0.0) sum = 1.0;
-    for (size_t i = 0; i < n; ++i) {
-        tmp[i] /= sum;
+    const double inv = 1.0 / sum;
+    for (size_t i = 0; i < n; ++i) out[i] *= inv;
+    return 0;
+}
+
+/* Row-wise softmax of a row-major rows x cols matrix; out may be X itself. */
+int softmax_rows(const double *X, size_t rows, size_t cols, double *out) {
+    if (!X || !out || cols == 0) return -1;
+    size_t total;
+    if (!mul_size_safe(rows, cols, &total)) return -1;
+    for (size_t r = 0; r < rows; ++r) {
+        softmax(X + r * cols, cols, out + r * cols);
     }
-    /* Safely write into out using snprintf and tracking remaining capacity */
+    return 0;
+}
+
+enum { ACT_LINEAR = 0, ACT_RELU = 1, ACT_SOFTMAX = 2 };
+
+/* Y = activation(X @ W + b) for X (m x k), W (k x n), b (n, may be NULL),
+   Y (m x n), all row-major. Bias and activation are applied one row tile at
+   a time, right after that tile of the product is computed, so Y is still
+   in cache. Returns 0, or -1 on bad input. */
+int dense_forward(const double *X, const double *W, const double *b, double *Y,
+                  size_t m, size_t k, size_t n, int activation) {
+    if (!X || !W || !Y || n == 0) return -1;
+    if (activation != ACT_LINEAR && activation != ACT_RELU && activation != ACT_SOFTMAX) return -1;
+    size_t total;
+    if (!mul_size_safe(m, n, &total)) return -1;
+
+    for (size_t i0 = 0; i0 < m; i0 += MM_BLOCK_M) {
+        size_t i1 = min_size(i0 + MM_BLOCK_M, m);
+        if (k == 0) {
+            memset(Y + i0 * n, 0, (i1 - i0) * n * sizeof(double));
+        } else {
+            matmul_rows(X, W, Y, i0, i1, k, n);
+        }
+        for (size_t i = i0; i < i1; ++i) {
+            double *restrict y = Y + i * n;
+            if (b) {
+                for (size_t j = 0; j < n; ++j) y[j] += b[j];
+            }
+            if (activation == ACT_RELU) {
+                for (size_t j = 0; j < n; ++j) y[j] = (y[j] > 0.0) ? y[j] : 0.0;
+            } else if (activation == ACT_SOFTMAX) {
+                softmax(y, n, y);
+            }
+        }
+    }
+    return 0;
+}
+
+/* softmax -> out buffer with capacity to avoid fixed-buffer overflow */
+void softmax_to_fixedbuf(const double *x, size_t n, char *out, size_t out_cap) {
+    if (!x || !out || out_cap == 0) return;
+    out[0] = '\0';
+    if (n == 0) return;
+    double maxv = x[0];
+    for (size_t i = 1; i < n; ++i) if (x[i] > maxv) maxv = x[i];
+    double sum = 0.0;
+    for (size_t i = 0; i < n; ++i) sum += exp(x[i] - maxv);
+    if (sum == 0.0) sum = 1.0;
+    /* Safely write into out using snprintf and tracking remaining capacity;
+       probabilities are recomputed here instead of kept in a temp array */
     size_t used = 0;
-    if (out_cap > 0) out[0] = '\0';
     for (size_t i = 0; i < n; ++i) {
-        int r = snprintf(out + used, (used < out_cap) ? (out_cap - used) : 0, "p[%zu]=%.6g ", i, tmp[i]);
+        int r = snprintf(out + used, (used < out_cap) ? (out_cap - used) : 0, "p[%zu]=%.6g ", i, exp(x[i] - maxv) / sum);
         if (r < 0) break;
         /* r does not include trailing NUL; but snprintf returns required/printed length */
         size_t to_add = (size_t) r;
@@ -91,7 +251,6 @@ void softmax_to_fixedbuf(const double *x, size_t n, char *out, size_t out_cap) {
         }
         used += to_add;
     }
-    free(tmp);
 }
 
 /* Atomic save with validations and overflow checks */
@@ -216,6 +375,479 @@ double* load_model_raw(const char *basepath, int *out_count) {
     return buf;
 }
 
+/* ---- Memory-mappable weights: "<basepath>/model.weights.map" ----
+   A fixed little-endian header followed by the raw array, starting at a
+   64-byte aligned offset, so a read-only mmap of the file is the array. */
+#define WEIGHTS_MAGIC "MLOPSWT"
+#define WEIGHTS_VERSION 1
+#define WEIGHTS_MAX_DIMS 8
+#define WEIGHTS_DATA_ALIGN 64
+
+enum { WEIGHTS_F64 = 1, WEIGHTS_F32 = 2, WEIGHTS_I32 = 3, WEIGHTS_I64 = 4, WEIGHTS_U8 = 5 };
+
+typedef struct {
+    char magic[8];              /* "MLOPSWT\0" */
+    uint32_t version;
+    uint32_t dtype;             /* WEIGHTS_F64 / WEIGHTS_F32 */
+    uint32_t ndim;
+    uint32_t reserved;
+    uint64_t shape[WEIGHTS_MAX_DIMS];
+    uint64_t data_offset;
+    uint64_t data_bytes;
+} weights_header;
+
+static size_t weights_itemsize(uint32_t dtype) {
+    switch (dtype) {
+        case WEIGHTS_F64: return sizeof(double);
+        case WEIGHTS_F32: return sizeof(float);
+        case WEIGHTS_I32: return sizeof(int32_t);
+        case WEIGHTS_I64: return sizeof(int64_t);
+        case WEIGHTS_U8: return sizeof(uint8_t);
+        default: return 0;
+    }
+}
+
+/* data_bytes implied by dtype and shape, 0 if invalid or overflowing */
+static size_t weights_expected_bytes(uint32_t dtype, uint32_t ndim, const uint64_t *shape) {
+    size_t bytes = weights_itemsize(dtype);
+    if (bytes == 0 || ndim > WEIGHTS_MAX_DIMS) return 0;
+    for (uint32_t d = 0; d < ndim; ++d) {
+        if (shape[d] > SIZE_MAX || !mul_size_safe(bytes, (size_t)shape[d], &bytes)) return 0;
+    }
+    return bytes;
+}
+
+static int write_all(int fd, const void *buf, size_t len) {
+    const char *p = (const char *)buf;
+    while (len > 0) {
+        ssize_t w = write(fd, p, len);
+        if (w <= 0) {
+            if (w < 0 && errno == EINTR) continue;
+            return -1;
+        }
+        p += w;
+        len -= (size_t)w;
+    }
+    return 0;
+}
+
+/* Atomically write an ndim array of dtype as model.weights.map. Returns 0 or a negative error. */
+int save_weights_mappable(const char *basepath, const void *data, uint32_t dtype,
+                          uint32_t ndim, const uint64_t *shape) {
+    if (!validate_basepath(basepath) || !data || (ndim > 0 && !shape)) return -1;
+    size_t data_bytes = weights_expected_bytes(dtype, ndim, shape);
+    if (data_bytes == 0) return -2;
+
+    char fname[PATH_MAX];
+    char tmpname[PATH_MAX];
+    if (snprintf(fname, sizeof(fname), "%s/model.weights.map", basepath) >= (int)sizeof(fname)) return -3;
+    if (snprintf(tmpname, sizeof(tmpname), "%s/.model.weights.map.tmp", basepath) >= (int)sizeof(tmpname)) return -3;
+
+    weights_header h;
+    memset(&h, 0, sizeof(h));
+    memcpy(h.magic, WEIGHTS_MAGIC, sizeof(WEIGHTS_MAGIC));
+    h.version = WEIGHTS_VERSION;
+    h.dtype = dtype;
+    h.ndim = ndim;
+    for (uint32_t d = 0; d < ndim; ++d) h.shape[d] = shape[d];
+    h.data_offset = (sizeof(h) + WEIGHTS_DATA_ALIGN - 1) / WEIGHTS_DATA_ALIGN * WEIGHTS_DATA_ALIGN;
+    h.data_bytes = data_bytes;
+
+#ifdef O_NOFOLLOW
+    int fd = open(tmpname, O_WRONLY | O_CREAT | O_EXCL | O_NOFOLLOW, S_IRUSR | S_IWUSR);
+#else
+    int fd = open(tmpname, O_WRONLY | O_CREAT | O_EXCL, S_IRUSR | S_IWUSR);
+#endif
+    if (fd < 0) return -4;
+
+    char pad[WEIGHTS_DATA_ALIGN] = {0};
+    if (write_all(fd, &h, sizeof(h)) != 0 ||
+        write_all(fd, pad, (size_t)h.data_offset - sizeof(h)) != 0 ||
+        write_all(fd, data, data_bytes) != 0) {
+        close(fd);
+        unlink(tmpname);
+        return -5;
+    }
+
+    fsync(fd);
+    close(fd);
+    if (rename(tmpname, fname) != 0) {
+        unlink(tmpname);
+        return -7;
+    }
+    return 0;
+}
+
+/* Map model.weights.map read-only and shared. On success returns the start of
+   the mapping (release it with unmap_weights(ptr, *out_map_len)) and fills
+   *out_header; the array is at ptr + out_header->data_offset. Only the
+   header is touched, pages are faulted in on demand, so this is O(1) in the
+   file size and concurrent readers share one copy in the page cache. */
+void *map_weights(const char *basepath, weights_header *out_header, size_t *out_map_len) {
+    if (!validate_basepath(basepath) || !out_header || !out_map_len) return NULL;
+    *out_map_len = 0;
+
+    char fname[PATH_MAX];
+    if (snprintf(fname, sizeof(fname), "%s/model.weights.map", basepath) >= (int)sizeof(fname)) return NULL;
+
+#ifdef O_NOFOLLOW
+    int fd = open(fname, O_RDONLY | O_NOFOLLOW);
+#else
+    int fd = open(fname, O_RDONLY);
+#endif
+    if (fd < 0) return NULL;
+
+    struct stat st;
+    if (fstat(fd, &st) != 0 || !S_ISREG(st.st_mode) || (uint64_t)st.st_size < sizeof(weights_header)) {
+        close(fd);
+        return NULL;
+    }
+    size_t map_len = (size_t)st.st_size;
+    void *base = mmap(NULL, map_len, PROT_READ, MAP_SHARED, fd, 0);
+    close(fd); /* the mapping keeps the file referenced */
+    if (base == MAP_FAILED) return NULL;
+
+    weights_header h;
+    memcpy(&h, base, sizeof(h));
+    size_t expected = weights_expected_bytes(h.dtype, h.ndim, h.shape);
+    if (memcmp(h.magic, WEIGHTS_MAGIC, sizeof(WEIGHTS_MAGIC)) != 0 || h.version != WEIGHTS_VERSION ||
+        expected == 0 || h.data_bytes != expected || h.data_offset % WEIGHTS_DATA_ALIGN != 0 ||
+        h.data_offset > map_len || h.data_bytes > map_len - h.data_offset) {
+        munmap(base, map_len);
+        return NULL;
+    }
+
+    *out_header = h;
+    *out_map_len = map_len;
+    return base;
+}
+
+void unmap_weights(void *base, size_t map_len) {
+    if (!base || map_len == 0) return;
+    munmap(base, map_len);
+}
+
+/* ---- Chunked checkpoints: "<basepath>/model.ckpt" ----
+   File header: magic "MLOPSCK\0", uint32 version, uint32 reserved.
+   Then a sequence of records, each a 16-byte header {uint32 tag, uint32
+   crc32 of the payload, uint64 payload length} followed by the payload:
+     TENS  dtype u32, ndim u32, shape u64[ndim], name bytes (no NUL)
+     DATA  raw tensor bytes, any number per tensor, in order
+     END_  uint64 tensor count; must be last, so truncation is detected
+   All integers are native little-endian. Lengths are 64-bit throughout. */
+#define CKPT_MAGIC "MLOPSCK"
+#define CKPT_VERSION 1
+#define CKPT_MAX_NAME 255
+#define CKPT_TAG(a, b, c, d) ((uint32_t)(a) | (uint32_t)(b) << 8 | (uint32_t)(c) << 16 | (uint32_t)(d) << 24)
+#define CKPT_TENS CKPT_TAG('T', 'E', 'N', 'S')
+#define CKPT_DATA CKPT_TAG('D', 'A', 'T', 'A')
+#define CKPT_END CKPT_TAG('E', 'N', 'D', '_')
+
+enum { CKPT_OK = 0, CKPT_EARG = -1, CKPT_EFORMAT = -2, CKPT_ECHECKSUM = -3, CKPT_EIO = -4 };
+
+typedef struct {
+    uint32_t tag;
+    uint32_t crc;
+    uint64_t len;
+} ckpt_record;
+
+/* CRC-32 (IEEE, as zlib.crc32), table driven; crc starts at 0 */
+static uint32_t crc32_table[256];
+static pthread_once_t crc32_once = PTHREAD_ONCE_INIT;
+
+static void crc32_init(void) {
+    for (uint32_t i = 0; i < 256; ++i) {
+        uint32_t c = i;
+        for (int k = 0; k < 8; ++k) c = (c & 1) ? 0xEDB88320u ^ (c >> 1) : c >> 1;
+        crc32_table[i] = c;
+    }
+}
+
+uint32_t mlops_crc32(uint32_t crc, const void *data, size_t len) {
+    pthread_once(&crc32_once, crc32_init);
+    const unsigned char *p = (const unsigned char *)data;
+    crc = ~crc;
+    while (len--) crc = crc32_table[(crc ^ *p++) & 0xFF] ^ (crc >> 8);
+    return ~crc;
+}
+
+static int read_all(int fd, void *buf, size_t len) {
+    char *p = (char *)buf;
+    while (len > 0) {
+        ssize_t r = read(fd, p, len);
+        if (r <= 0) {
+            if (r < 0 && errno == EINTR) continue;
+            return -1;
+        }
+        p += r;
+        len -= (size_t)r;
+    }
+    return 0;
+}
+
+/* byte length of a tensor; unlike weights_expected_bytes, empty tensors are fine */
+static int ckpt_tensor_bytes(uint32_t dtype, uint32_t ndim, const uint64_t *shape, uint64_t *out) {
+    uint64_t bytes = weights_itemsize(dtype);
+    if (bytes == 0 || ndim > WEIGHTS_MAX_DIMS) return 0;
+    for (uint32_t d = 0; d < ndim; ++d) {
+        if (shape[d] != 0 && bytes > UINT64_MAX / shape[d]) return 0;
+        bytes *= shape[d];
+    }
+    *out = bytes;
+    return 1;
+}
+
+typedef struct {
+    int fd;
+    char fname[PATH_MAX];
+    char tmpname[PATH_MAX];
+    uint64_t tensors;
+    uint64_t remaining; /* bytes still owed to the open tensor */
+    int in_tensor;
+} ckpt_writer;
+
+static int ckpt_write_record(ckpt_writer *w, uint32_t tag, const void *payload, uint64_t len) {
+    ckpt_record rec = {tag, mlops_crc32(0, payload, (size_t)len), len};
+    if (write_all(w->fd, &rec, sizeof(rec)) != 0) return CKPT_EIO;
+    if (len > 0 && write_all(w->fd, payload, (size_t)len) != 0) return CKPT_EIO;
+    return CKPT_OK;
+}
+
+/* Start writing model.ckpt under basepath. Data goes to a temp file that only
+   replaces model.ckpt in ckpt_commit; returns NULL on error. */
+ckpt_writer *ckpt_open_write(const char *basepath) {
+    if (!validate_basepath(basepath)) return NULL;
+    ckpt_writer *w = (ckpt_writer *)calloc(1, sizeof(*w));
+    if (!w) return NULL;
+    if (snprintf(w->fname, sizeof(w->fname), "%s/model.ckpt", basepath) >= (int)sizeof(w->fname) ||
+        snprintf(w->tmpname, sizeof(w->tmpname), "%s/.model.ckpt.tmp", basepath) >= (int)sizeof(w->tmpname)) {
+        free(w);
+        return NULL;
+    }
+#ifdef O_NOFOLLOW
+    w->fd = open(w->tmpname, O_WRONLY | O_CREAT | O_EXCL | O_NOFOLLOW, S_IRUSR | S_IWUSR);
+#else
+    w->fd = open(w->tmpname, O_WRONLY | O_CREAT | O_EXCL, S_IRUSR | S_IWUSR);
+#endif
+    if (w->fd < 0) {
+        free(w);
+        return NULL;
+    }
+    char header[16] = {0};
+    uint32_t version = CKPT_VERSION;
+    memcpy(header, CKPT_MAGIC, sizeof(CKPT_MAGIC));
+    memcpy(header + 8, &version, sizeof(version));
+    if (write_all(w->fd, header, sizeof(header)) != 0) {
+        close(w->fd);
+        unlink(w->tmpname);
+        free(w);
+        return NULL;
+    }
+    return w;
+}
+
+int ckpt_begin_tensor(ckpt_writer *w, const char *name, uint32_t dtype, uint32_t ndim, const uint64_t *shape) {
+    if (!w || w->in_tensor || !name || (ndim > 0 && !shape)) return CKPT_EARG;
+    size_t name_len = strnlen(name, CKPT_MAX_NAME + 1);
+    if (name_len == 0 || name_len > CKPT_MAX_NAME) return CKPT_EARG;
+    uint64_t bytes;
+    if (!ckpt_tensor_bytes(dtype, ndim, shape, &bytes)) return CKPT_EARG;
+
+    unsigned char payload[8 + WEIGHTS_MAX_DIMS * 8 + CKPT_MAX_NAME];
+    memcpy(payload, &dtype, 4);
+    memcpy(payload + 4, &ndim, 4);
+    if (ndim > 0) memcpy(payload + 8, shape, (size_t)ndim * 8);
+    memcpy(payload + 8 + (size_t)ndim * 8, name, name_len);
+    int rc = ckpt_write_record(w, CKPT_TENS, payload, 8 + (uint64_t)ndim * 8 + name_len);
+    if (rc != CKPT_OK) return rc;
+    w->in_tensor = 1;
+    w->remaining = bytes;
+    return CKPT_OK;
+}
+
+/* Append the next len bytes of the open tensor as one checksummed chunk. */
+int ckpt_write_chunk(ckpt_writer *w, const void *data, uint64_t len) {
+    if (!w || !w->in_tensor || (len > 0 && !data)) return CKPT_EARG;
+    if (len > w->remaining || len > SIZE_MAX) return CKPT_EARG;
+    if (len == 0) return CKPT_OK;
+    int rc = ckpt_write_record(w, CKPT_DATA, data, len);
+    if (rc != CKPT_OK) return rc;
+    w->remaining -= len;
+    return CKPT_OK;
+}
+
+int ckpt_end_tensor(ckpt_writer *w) {
+    if (!w || !w->in_tensor || w->remaining != 0) return CKPT_EARG;
+    w->in_tensor = 0;
+    w->tensors++;
+    return CKPT_OK;
+}
+
+/* Discard the temp file; the previous model.ckpt, if any, is untouched. */
+void ckpt_abort(ckpt_writer *w) {
+    if (!w) return;
+    close(w->fd);
+    unlink(w->tmpname);
+    free(w);
+}
+
+/* Seal the file, fsync and atomically rename it over model.ckpt. Always
+   consumes w; on failure the temp file is removed. */
+int ckpt_commit(ckpt_writer *w) {
+    if (!w) return CKPT_EARG;
+    if (w->in_tensor) {
+        ckpt_abort(w);
+        return CKPT_EARG;
+    }
+    if (ckpt_write_record(w, CKPT_END, &w->tensors, sizeof(w->tensors)) != CKPT_OK || fsync(w->fd) != 0) {
+        ckpt_abort(w);
+        return CKPT_EIO;
+    }
+    close(w->fd);
+    int rc = rename(w->tmpname, w->fname) == 0 ? CKPT_OK : CKPT_EIO;
+    if (rc != CKPT_OK) unlink(w->tmpname);
+    free(w);
+    return rc;
+}
+
+typedef struct {
+    int fd;
+    int in_tensor;
+    uint64_t tensor_remaining; /* data bytes of the current tensor not yet read */
+    uint64_t chunk_remaining;  /* bytes left in the current DATA record */
+    uint32_t chunk_crc;        /* expected crc of the current DATA record */
+    uint32_t running_crc;      /* crc of what has been read of it so far */
+    uint64_t tensors;
+} ckpt_reader;
+
+ckpt_reader *ckpt_open_read(const char *basepath) {
+    if (!validate_basepath(basepath)) return NULL;
+    char fname[PATH_MAX];
+    if (snprintf(fname, sizeof(fname), "%s/model.ckpt", basepath) >= (int)sizeof(fname)) return NULL;
+#ifdef O_NOFOLLOW
+    int fd = open(fname, O_RDONLY | O_NOFOLLOW);
+#else
+    int fd = open(fname, O_RDONLY);
+#endif
+    if (fd < 0) return NULL;
+
+    char header[16];
+    uint32_t version;
+    struct stat st;
+    if (fstat(fd, &st) != 0 || !S_ISREG(st.st_mode) || read_all(fd, header, sizeof(header)) != 0 ||
+        memcmp(header, CKPT_MAGIC, sizeof(CKPT_MAGIC)) != 0) {
+        close(fd);
+        return NULL;
+    }
+    memcpy(&version, header + 8, sizeof(version));
+    if (version != CKPT_VERSION) {
+        close(fd);
+        return NULL;
+    }
+    ckpt_reader *r = (ckpt_reader *)calloc(1, sizeof(*r));
+    if (!r) {
+        close(fd);
+        return NULL;
+    }
+    r->fd = fd;
+    return r;
+}
+
+void ckpt_close_read(ckpt_reader *r) {
+    if (!r) return;
+    close(r->fd);
+    free(r);
+}
+
+/* Read up to cap bytes of the current tensor into buf, verifying each chunk's
+   checksum as its last byte is consumed. Returns the number of bytes read,
+   0 once the tensor is exhausted, or a negative CKPT_E* code. */
+int64_t ckpt_read(ckpt_reader *r, void *buf, uint64_t cap) {
+    if (!r || (cap > 0 && !buf)) return CKPT_EARG;
+    if (!r->in_tensor) return 0;
+    if (cap > r->tensor_remaining) cap = r->tensor_remaining;
+    if (cap > (uint64_t)INT64_MAX) cap = (uint64_t)INT64_MAX;
+    if (cap > SIZE_MAX) cap = SIZE_MAX;
+
+    char *out = (char *)buf;
+    uint64_t got = 0;
+    while (got < cap) {
+        if (r->chunk_remaining == 0) {
+            ckpt_record rec;
+            if (read_all(r->fd, &rec, sizeof(rec)) != 0) return CKPT_EIO;
+            if (rec.tag != CKPT_DATA || rec.len == 0 || rec.len > r->tensor_remaining - got) return CKPT_EFORMAT;
+            r->chunk_remaining = rec.len;
+            r->chunk_crc = rec.crc;
+            r->running_crc = 0;
+        }
+        uint64_t n = cap - got < r->chunk_remaining ? cap - got : r->chunk_remaining;
+        if (read_all(r->fd, out + got, (size_t)n) != 0) return CKPT_EIO;
+        r->running_crc = mlops_crc32(r->running_crc, out + got, (size_t)n);
+        r->chunk_remaining -= n;
+        got += n;
+        if (r->chunk_remaining == 0 && r->running_crc != r->chunk_crc) return CKPT_ECHECKSUM;
+    }
+    r->tensor_remaining -= got;
+    return (int64_t)got;
+}
+
+/* Advance to the next tensor, skipping unread data of the current one.
+   Fills name (NUL-terminated, name_cap >= CKPT_MAX_NAME + 1), dtype, ndim
+   and shape (room for WEIGHTS_MAX_DIMS). Returns 1 for a tensor, 0 at the
+   end of a complete file, or a negative CKPT_E* code. */
+int ckpt_next_tensor(ckpt_reader *r, char *name, size_t name_cap, uint32_t *dtype, uint32_t *ndim,
+                     uint64_t *shape) {
+    if (!r || !name || name_cap <= CKPT_MAX_NAME || !dtype || !ndim || !shape) return CKPT_EARG;
+
+    /* skipped data is not checksummed; only what is actually read is */
+    uint64_t skip = r->chunk_remaining;
+    uint64_t left = r->tensor_remaining - r->chunk_remaining;
+    while (r->in_tensor) {
+        if (skip > 0 && lseek(r->fd, (off_t)skip, SEEK_CUR) < 0) return CKPT_EIO;
+        if (left == 0) break;
+        ckpt_record rec;
+        if (read_all(r->fd, &rec, sizeof(rec)) != 0) return CKPT_EIO;
+        if (rec.tag != CKPT_DATA || rec.len == 0 || rec.len > left) return CKPT_EFORMAT;
+        skip = rec.len;
+        left -= rec.len;
+    }
+    r->in_tensor = 0;
+    r->tensor_remaining = r->chunk_remaining = 0;
+
+    ckpt_record rec;
+    if (read_all(r->fd, &rec, sizeof(rec)) != 0) return CKPT_EIO;
+    if (rec.tag == CKPT_END) {
+        uint64_t count;
+        if (rec.len != sizeof(count) || read_all(r->fd, &count, sizeof(count)) != 0) return CKPT_EFORMAT;
+        if (mlops_crc32(0, &count, sizeof(count)) != rec.crc) return CKPT_ECHECKSUM;
+        return count == r->tensors ? 0 : CKPT_EFORMAT;
+    }
+    unsigned char payload[8 + WEIGHTS_MAX_DIMS * 8 + CKPT_MAX_NAME];
+    if (rec.tag != CKPT_TENS || rec.len < 8 || rec.len > sizeof(payload)) return CKPT_EFORMAT;
+    if (read_all(r->fd, payload, (size_t)rec.len) != 0) return CKPT_EIO;
+    if (mlops_crc32(0, payload, (size_t)rec.len) != rec.crc) return CKPT_ECHECKSUM;
+
+    uint32_t dt, nd;
+    memcpy(&dt, payload, 4);
+    memcpy(&nd, payload + 4, 4);
+    if (nd > WEIGHTS_MAX_DIMS || rec.len < 8 + (uint64_t)nd * 8 + 1) return CKPT_EFORMAT;
+    memcpy(shape, payload + 8, (size_t)nd * 8);
+    uint64_t bytes;
+    if (!ckpt_tensor_bytes(dt, nd, shape, &bytes)) return CKPT_EFORMAT;
+    size_t name_len = (size_t)(rec.len - 8 - (uint64_t)nd * 8);
+    /* the same limit the writer enforces: a crafted record must not overrun name */
+    if (name_len == 0 || name_len > CKPT_MAX_NAME || name_len >= name_cap) return CKPT_EFORMAT;
+    memcpy(name, payload + 8 + (size_t)nd * 8, name_len);
+    name[name_len] = '\0';
+
+    *dtype = dt;
+    *ndim = nd;
+    r->in_tensor = 1;
+    r->tensor_remaining = bytes;
+    r->tensors++;
+    return 1;
+}
+
 void c_free_model(void *p) {
     if (!p) return;
     free(p);
@@ -0,0 +1,428 @@
+"""NumPy front end for the mlops native library.
+
+Arrays that are already C-contiguous float64 are passed to C as-is, without
+a copy; anything else is converted once on the way in.
+"""
+import ctypes as ct
+import threading
+import weakref
+
+import numpy as np
+
+from bindings import WEIGHTS_MAX_DIMS as _WEIGHTS_MAX_DIMS, WeightsHeader, lib, np_ptr
+
+ACTIVATIONS = {"linear": 0, "relu": 1, "softmax": 2}
+
+_WEIGHTS_DTYPES = {
+    np.dtype(np.float64): 1,
+    np.dtype(np.float32): 2,
+    np.dtype(np.int32): 3,
+    np.dtype(np.int64): 4,
+    np.dtype(np.uint8): 5,
+}
+_WEIGHTS_CODES = {code: dtype for dtype, code in _WEIGHTS_DTYPES.items()}
+
+
+def _as_matrix(x, name: str) -> np.ndarray:
+    arr = np.asarray(x)
+    if arr.ndim != 2:
+        raise ValueError(f"{name} must be 2-D, got shape {arr.shape}")
+    return np.ascontiguousarray(arr, dtype=np.float64)
+
+
+def _check_out(out, shape, inputs, allow_alias=False) -> np.ndarray:
+    if not isinstance(out, np.ndarray):
+        raise TypeError("out must be a numpy.ndarray")
+    if out.shape != shape:
+        raise ValueError(f"out must have shape {shape}, got {out.shape}")
+    if out.dtype != np.float64 or not out.flags.c_contiguous or not out.flags.writeable:
+        raise ValueError("out must be a writeable C-contiguous float64 array")
+    if any(np.shares_memory(out, x) and not (allow_alias and out is x) for x in inputs):
+        raise ValueError("out must not overlap the inputs")
+    return out
+
+
+def matmul(A, B, out=None, threads: int = 1) -> np.ndarray:
+    """Return ``A @ B`` computed by the cache-blocked native kernel.
+
+    ``threads`` > 1 splits the rows of the result across that many threads,
+    0 uses one per CPU. ``out`` may be a preallocated result array.
+    """
+    A = _as_matrix(A, "A")
+    B = _as_matrix(B, "B")
+    m, k = A.shape
+    k2, n = B.shape
+    if k != k2:
+        raise ValueError(f"shapes {A.shape} and {B.shape} are not aligned")
+    out = np.empty((m, n), dtype=np.float64) if out is None else _check_out(out, (m, n), (A, B))
+
+    if m == 0 or n == 0:
+        return out
+    if k == 0:
+        out.fill(0.0)
+        return out
+    if threads == 1:
+        lib.matmul_blocked(np_ptr(A), np_ptr(B), np_ptr(out), m, k, n)
+    else:
+        lib.matmul_blocked_mt(np_ptr(A), np_ptr(B), np_ptr(out), m, k, n, threads)
+    return out
+
+
+def softmax(x, out=None) -> np.ndarray:
+    """Softmax of a 1-D array, or of each row of a 2-D array, as float64.
+
+    Probabilities are written straight into ``out`` (allocated if omitted);
+    ``out=x`` computes in place when ``x`` is C-contiguous float64.
+    """
+    x = np.asarray(x)
+    if x.ndim not in (1, 2):
+        raise ValueError(f"x must be 1-D or 2-D, got shape {x.shape}")
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    out = np.empty_like(x) if out is None else _check_out(out, x.shape, (x,), allow_alias=True)
+    if x.size == 0:
+        return out
+    if x.ndim == 1:
+        lib.softmax(np_ptr(x), x.shape[0], np_ptr(out))
+    else:
+        lib.softmax_rows(np_ptr(x), x.shape[0], x.shape[1], np_ptr(out))
+    return out
+
+
+def _activation_code(activation) -> int:
+    code = ACTIVATIONS.get(activation or "linear")
+    if code is None:
+        raise ValueError(f"unknown activation {activation!r}, expected one of {sorted(ACTIVATIONS)}")
+    return code
+
+
+def dense_forward(X, W, b=None, activation: str = "linear", out=None) -> np.ndarray:
+    """``activation(X @ W + b)`` in a single native call.
+
+    ``activation`` is ``"linear"``, ``"relu"`` or ``"softmax"`` (row-wise);
+    ``out`` may be a preallocated ``(len(X), W.shape[1])`` result array.
+    """
+    X = _as_matrix(X, "X")
+    W = _as_matrix(W, "W")
+    m, k = X.shape
+    k2, n = W.shape
+    if k != k2:
+        raise ValueError(f"shapes {X.shape} and {W.shape} are not aligned")
+    if b is not None:
+        b = np.ascontiguousarray(b, dtype=np.float64)
+        if b.shape != (n,):
+            raise ValueError(f"b must have shape ({n},), got {b.shape}")
+    code = _activation_code(activation)
+    inputs = (X, W) if b is None else (X, W, b)
+    out = np.empty((m, n), dtype=np.float64) if out is None else _check_out(out, (m, n), inputs)
+    if m == 0 or n == 0:
+        return out
+    lib.dense_forward(np_ptr(X), np_ptr(W), None if b is None else np_ptr(b), np_ptr(out), m, k, n, code)
+    return out
+
+
+class Dense:
+    """A fully connected layer: ``W`` is ``(inputs, units)``, ``b`` is ``(units,)`` or None."""
+
+    def __init__(self, W, b=None, activation: str = "linear"):
+        self.W = _as_matrix(W, "W")
+        self.b = None if b is None else np.ascontiguousarray(b, dtype=np.float64)
+        if self.b is not None and self.b.shape != (self.W.shape[1],):
+            raise ValueError(f"b must have shape ({self.W.shape[1]},), got {self.b.shape}")
+        self.activation = activation
+        self._code = _activation_code(activation)
+        # building ctypes pointers costs more than a small layer's arithmetic, so do it once
+        self._W_p = np_ptr(self.W)
+        self._b_p = None if self.b is None else np_ptr(self.b)
+
+    @property
+    def inputs(self) -> int:
+        return self.W.shape[0]
+
+    @property
+    def units(self) -> int:
+        return self.W.shape[1]
+
+
+class Sequential:
+    """Inference-only stack of :class:`Dense` layers run entirely in native code.
+
+    Intermediate activations live in two workspace buffers that are kept
+    between calls and only grow when a larger batch arrives, so repeated
+    small-batch predictions do not allocate anything but the result. Each
+    thread gets its own pair: the native calls release the GIL, so threads
+    sharing a model predict concurrently without overwriting each other.
+    """
+
+    def __init__(self, layers):
+        self.layers = list(layers)
+        if not self.layers:
+            raise ValueError("Sequential needs at least one layer")
+        for prev, layer in zip(self.layers, self.layers[1:]):
+            if prev.units != layer.inputs:
+                raise ValueError(f"layer with {prev.units} units cannot feed a layer with {layer.inputs} inputs")
+        self._width = max(layer.units for layer in self.layers[:-1]) if len(self.layers) > 1 else 0
+        self._local = threading.local()
+
+    def _buffers(self, batch: int):
+        ws = self._local
+        if batch > getattr(ws, "capacity", -1):
+            ws.buffers = (np.empty(batch * self._width), np.empty(batch * self._width))
+            ws.pointers = tuple(np_ptr(buf) for buf in ws.buffers)
+            ws.capacity = batch
+        return ws.pointers
+
+    def predict(self, X, out=None) -> np.ndarray:
+        """Run ``X`` (``(batch, inputs)``) through every layer; ``out`` may be a preallocated result."""
+        X = _as_matrix(X, "X")
+        if X.shape[1] != self.layers[0].inputs:
+            raise ValueError(f"X must have {self.layers[0].inputs} columns, got {X.shape[1]}")
+        batch = X.shape[0]
+        last = self.layers[-1]
+        out = np.empty((batch, last.units)) if out is None else _check_out(out, (batch, last.units), (X,))
+        if batch == 0:
+            return out
+
+        ping, pong = self._buffers(batch)
+        src = np_ptr(X)
+        for layer in self.layers[:-1]:
+            lib.dense_forward(src, layer._W_p, layer._b_p, ping, batch, layer.inputs, layer.units, layer._code)
+            src = ping
+            ping, pong = pong, ping
+        lib.dense_forward(src, last._W_p, last._b_p, np_ptr(out), batch, last.inputs, last.units, last._code)
+        return out
+
+
+def save_weights(basepath: str, weights) -> None:
+    """Write ``weights`` (float64 or float32, up to 8-D) to ``<basepath>/model.weights.map``.
+
+    The file is replaced atomically, so readers holding a mapping of the old
+    file keep seeing the old weights.
+    """
+    arr = np.asarray(weights)
+    if arr.dtype not in _WEIGHTS_DTYPES:
+        arr = arr.astype(np.float64)
+    if arr.ndim > _WEIGHTS_MAX_DIMS:
+        raise ValueError(f"weights may have at most {_WEIGHTS_MAX_DIMS} dimensions, got {arr.ndim}")
+    if arr.size == 0:
+        raise ValueError("weights must not be empty")
+    arr = np.ascontiguousarray(arr)
+    shape = (ct.c_uint64 * _WEIGHTS_MAX_DIMS)(*arr.shape)
+    rc = lib.save_weights_mappable(basepath.encode(), arr.ctypes.data, _WEIGHTS_DTYPES[arr.dtype], arr.ndim, shape)
+    if rc != 0:
+        raise OSError(f"save_weights_mappable failed with code {rc}")
+
+
+def load_weights_mmap(basepath: str) -> np.ndarray:
+    """Map ``<basepath>/model.weights.map`` and return it as a read-only array.
+
+    Nothing is copied: the array is a view of the shared page cache, so load
+    time does not depend on the model size and processes loading the same
+    file share its memory. The mapping is released once the array and every
+    view derived from it are garbage collected.
+    """
+    header = WeightsHeader()
+    map_len = ct.c_size_t()
+    base = lib.map_weights(basepath.encode(), ct.byref(header), ct.byref(map_len))
+    if not base:
+        raise OSError(f"cannot map weights from {basepath!r}")
+    buf = (ct.c_char * header.data_bytes).from_address(base + header.data_offset)
+    weakref.finalize(buf, lib.unmap_weights, base, map_len.value)
+    arr = np.frombuffer(buf, dtype=_WEIGHTS_CODES[header.dtype])
+    arr = arr.reshape(tuple(header.shape[:header.ndim]))
+    arr.flags.writeable = False
+    return arr
+
+
+CHECKPOINT_CHUNK_BYTES = 4 << 20
+_CKPT_ERRORS = {
+    -1: "invalid argument",
+    -2: "malformed checkpoint",
+    -3: "checksum mismatch",
+    -4: "I/O error or truncated file",
+}
+
+
+def _ckpt_check(rc: int, what: str) -> int:
+    if rc < 0:
+        raise OSError(f"{what} failed: {_CKPT_ERRORS.get(rc, rc)}")
+    return rc
+
+
+def _ckpt_dtype(dtype) -> np.dtype:
+    native = np.dtype(dtype).newbyteorder("=")
+    if native not in _WEIGHTS_DTYPES:
+        raise ValueError(f"unsupported dtype {dtype}, expected one of {[str(d) for d in _WEIGHTS_DTYPES]}")
+    return native
+
+
+def _c_order_blocks(arr: np.ndarray, chunk_bytes: int):
+    """Contiguous pieces of ``arr`` in C order, each about ``chunk_bytes`` or less.
+
+    Contiguous arrays are sliced without copying; for anything else only one
+    piece at a time is materialised.
+    """
+    if arr.flags.c_contiguous:
+        flat = arr.reshape(-1)
+        step = max(1, chunk_bytes // arr.itemsize)
+        for i in range(0, flat.size, step):
+            yield flat[i:i + step]
+        return
+    row_bytes = arr.itemsize * (arr[0].size if arr.ndim > 1 and len(arr) else 1)
+    rows = max(1, chunk_bytes // max(1, row_bytes))
+    for i in range(0, len(arr), rows):
+        if rows > 1 or arr.ndim == 1:
+            yield np.ascontiguousarray(arr[i:i + rows])
+        else:
+            yield from _c_order_blocks(arr[i], chunk_bytes)
+
+
+class CheckpointWriter:
+    """Streams named tensors into ``<basepath>/model.ckpt``.
+
+    Every chunk is checksummed, and the file only replaces an existing
+    checkpoint on :meth:`commit` (or a clean exit from the ``with`` block),
+    so a crash mid-save leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, basepath: str, chunk_bytes: int = CHECKPOINT_CHUNK_BYTES):
+        if chunk_bytes <= 0:
+            raise ValueError("chunk_bytes must be positive")
+        self.chunk_bytes = chunk_bytes
+        self._dtype = None
+        self._handle = lib.ckpt_open_write(basepath.encode())
+        if not self._handle:
+            raise OSError(f"cannot create a checkpoint in {basepath!r}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def _live(self):
+        if not self._handle:
+            raise ValueError("checkpoint is already committed or aborted")
+        return self._handle
+
+    def begin_tensor(self, name: str, dtype, shape) -> None:
+        """Open a tensor whose data will follow in C order through :meth:`write`."""
+        self._dtype = _ckpt_dtype(dtype)
+        shape = tuple(int(d) for d in shape)
+        if len(shape) > _WEIGHTS_MAX_DIMS or any(d < 0 for d in shape):
+            raise ValueError(f"invalid shape {shape}")
+        c_shape = (ct.c_uint64 * _WEIGHTS_MAX_DIMS)(*shape)
+        _ckpt_check(lib.ckpt_begin_tensor(self._live(), name.encode(), _WEIGHTS_DTYPES[self._dtype],
+                                          len(shape), c_shape), f"begin tensor {name!r}")
+
+    def write(self, data) -> None:
+        """Append the next elements of the open tensor."""
+        for block in _c_order_blocks(np.asarray(data), self.chunk_bytes):
+            block = np.ascontiguousarray(block, dtype=self._dtype)
+            _ckpt_check(lib.ckpt_write_chunk(self._live(), block.ctypes.data, block.nbytes), "write chunk")
+
+    def end_tensor(self) -> None:
+        _ckpt_check(lib.ckpt_end_tensor(self._live()), "end tensor (were all elements written?)")
+        self._dtype = None
+
+    def write_tensor(self, name: str, array) -> None:
+        """Write a whole array, ``chunk_bytes`` at a time (np.memmap arrays are never read in full)."""
+        arr = np.asarray(array)
+        self.begin_tensor(name, arr.dtype, arr.shape)
+        self.write(arr)
+        self.end_tensor()
+
+    def commit(self) -> None:
+        handle, self._handle = self._live(), None
+        _ckpt_check(lib.ckpt_commit(handle), "commit checkpoint")
+
+    def abort(self) -> None:
+        if self._handle:
+            handle, self._handle = self._handle, None
+            lib.ckpt_abort(handle)
+
+
+class CheckpointReader:
+    """Iterates the tensors of ``<basepath>/model.ckpt`` without loading them.
+
+    Iterating yields ``(name, dtype, shape)``; the data of the current tensor
+    is then available through :meth:`read_chunks`, :meth:`read_into` or
+    :meth:`read`, and is verified against its checksums as it is read.
+    """
+
+    def __init__(self, basepath: str, chunk_bytes: int = CHECKPOINT_CHUNK_BYTES):
+        self.chunk_bytes = chunk_bytes
+        self._current = None
+        self._handle = lib.ckpt_open_read(basepath.encode())
+        if not self._handle:
+            raise OSError(f"cannot open a checkpoint in {basepath!r}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if self._handle:
+            handle, self._handle = self._handle, None
+            lib.ckpt_close_read(handle)
+
+    def __iter__(self):
+        name = ct.create_string_buffer(256)
+        dtype = ct.c_uint32()
+        ndim = ct.c_uint32()
+        shape = (ct.c_uint64 * _WEIGHTS_MAX_DIMS)()
+        while self._handle:
+            rc = _ckpt_check(lib.ckpt_next_tensor(self._handle, name, len(name), ct.byref(dtype), ct.byref(ndim),
+                                                  shape), "read tensor header")
+            if rc == 0:
+                self._current = None
+                return
+            self._current = (name.value.decode(), _WEIGHTS_CODES[dtype.value], tuple(shape[:ndim.value]))
+            yield self._current
+
+    def _tensor(self):
+        if self._current is None:
+            raise ValueError("no current tensor; iterate the reader first")
+        return self._current
+
+    def read_chunks(self):
+        """Yield the rest of the current tensor as flat arrays of at most ``chunk_bytes``."""
+        dtype = self._tensor()[1]
+        count = max(1, self.chunk_bytes // dtype.itemsize)
+        while True:
+            buf = np.empty(count, dtype=dtype)
+            got = _ckpt_check(lib.ckpt_read(self._handle, buf.ctypes.data, buf.nbytes), "read chunk")
+            if got == 0:
+                return
+            yield buf[:got // dtype.itemsize]
+
+    def read_into(self, out: np.ndarray) -> np.ndarray:
+        """Fill ``out`` (e.g. a writeable np.memmap) with the whole current tensor."""
+        _, dtype, shape = self._tensor()
+        if out.dtype != dtype or out.shape != shape or not out.flags.c_contiguous or not out.flags.writeable:
+            raise ValueError(f"out must be a writeable C-contiguous {dtype} array of shape {shape}")
+        got = _ckpt_check(lib.ckpt_read(self._handle, out.ctypes.data, out.nbytes), "read tensor")
+        if got != out.nbytes:
+            raise OSError("read tensor failed: data already partly consumed")
+        return out
+
+    def read(self) -> np.ndarray:
+        _, dtype, shape = self._tensor()
+        return self.read_into(np.empty(shape, dtype=dtype))
+
+
+def save_checkpoint(basepath: str, tensors: dict, chunk_bytes: int = CHECKPOINT_CHUNK_BYTES) -> None:
+    """Atomically write ``{name: array}`` as ``<basepath>/model.ckpt``."""
+    with CheckpointWriter(basepath, chunk_bytes) as writer:
+        for name, array in tensors.items():
+            writer.write_tensor(name, array)
+
+
+def load_checkpoint(basepath: str) -> dict:
+    """Read every tensor of ``<basepath>/model.ckpt`` into memory."""
+    with CheckpointReader(basepath) as reader:
+        return {name: reader.read() for name, _, _ in reader}
@@ -0,0 +1,59 @@
+"""Checkpoint reader hardening: malformed records must be rejected, not copied."""
+import os
+import shutil
+import struct
+import subprocess
+import zlib
+
+import numpy as np
+import pytest
+
+LIBRARY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CKPT_TENS = struct.unpack("<I", b"TENS")[0]
+
+
+@pytest.fixture(scope="module")
+def mlops(tmp_path_factory):
+    if shutil.which("gcc") is None:
+        pytest.skip("gcc is needed to build the library")
+    lib = tmp_path_factory.mktemp("lib") / "libmlops_ml.so"
+    subprocess.run(["gcc", "-O1", "-fPIC", "-shared", "-pthread", os.path.join(LIBRARY_DIR, "mlops.c"),
+                    "-o", str(lib), "-lm"], check=True)
+    # module scoped, so the function-scoped monkeypatch fixture is not available; undone after the module
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("MLOPS_LIB", str(lib))
+        mp.syspath_prepend(LIBRARY_DIR)
+        import mlops
+        yield mlops
+
+
+def _write_tens_record(path, payload: bytes):
+    with open(os.path.join(path, "model.ckpt"), "wb") as f:
+        f.write(b"MLOPSCK\0" + struct.pack("<II", 1, 0))
+        f.write(struct.pack("<IIQ", CKPT_TENS, zlib.crc32(payload), len(payload)))
+        f.write(payload)
+
+
+@pytest.fixture
+def basepath(tmp_path, monkeypatch):
+    # the library only accepts relative base paths
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("ckpt")
+    return "ckpt"
+
+
+def test_round_trip_longest_name(mlops, basepath):
+    name = "w" * 255
+    mlops.save_checkpoint(basepath, {name: np.arange(6.0).reshape(2, 3)})
+    loaded = mlops.load_checkpoint(basepath)
+    assert list(loaded) == [name]
+    np.testing.assert_array_equal(loaded[name], np.arange(6.0).reshape(2, 3))
+
+
+@pytest.mark.parametrize("name_len", [0, 256, 319])
+def test_tensor_name_length_is_checked(mlops, basepath, name_len):
+    # ndim=0 leaves the whole rest of the largest accepted record to the name
+    _write_tens_record(basepath, struct.pack("<II", 1, 0) + b"A" * name_len)
+    with mlops.CheckpointReader(basepath) as reader:
+        with pytest.raises(OSError, match="malformed checkpoint"):
+            next(iter(reader))
@@ -0,0 +1,178 @@
+"""Concurrent GET /file?mode=download throughput and server CPU cost per byte.
+
+Starts the API in a scratch directory under each server configuration,
+uploads a handful of max-size (10 MB) files, then downloads them from many
+concurrent clients and reports MB/s and server CPU milliseconds per MB:
+
+    uvicorn-64k   uvicorn, files streamed in 64 KiB chunks (the old FileResponse)
+    uvicorn-1m    uvicorn, 1 MiB chunks (DownloadResponse fallback)
+    granian       Granian, which implements ASGI pathsend: the file goes out via sendfile(2)
+
+Usage (from rest-api):
+    python benchmarks/downloads.py [--servers uvicorn-64k uvicorn-1m granian] [--concurrency 1 8 32]
+                                   [--requests 128] [--files 8] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import psutil
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+FILE_SIZE = 10 * (1 << 20)
+
+SERVERS = {
+    "uvicorn-64k": ([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", "{port}"],
+                    {"DOWNLOAD_CHUNK_SIZE": str(64 * 1024)}),
+    "uvicorn-1m": ([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", "{port}"],
+                   {"DOWNLOAD_CHUNK_SIZE": str(1 << 20)}),
+    "granian": ([sys.executable, "-m", "granian", "--interface", "asgi", "--host", "127.0.0.1", "--port", "{port}",
+                 "main:app"], {}),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _Server:
+    def __init__(self, name: str, workdir: str):
+        self.port = _free_port()
+        cmd, extra_env = SERVERS[name]
+        env = dict(os.environ, PYTHONPATH=SRC_DIR, RATE_LIMIT_ENABLED="0",
+                   UPLOAD_FOLDER=os.path.join(workdir, "uploads"), **extra_env)
+        self.proc = subprocess.Popen([c.format(port=self.port) for c in cmd], cwd=workdir, env=env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    async def wait_ready(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            while time.monotonic() < deadline:
+                try:
+                    if (await client.get(f"{self.url}/health")).status_code == 200:
+                        return
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.2)
+        raise RuntimeError("server did not start")
+
+    def cpu_seconds(self) -> float:
+        """User + system CPU of the server and any worker processes it spawned."""
+        total = 0.0
+        proc = psutil.Process(self.proc.pid)
+        for p in [proc, *proc.children(recursive=True)]:
+            try:
+                times = p.cpu_times()
+                total += times.user + times.system
+            except psutil.NoSuchProcess:
+                pass
+        return total
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+async def _seed(url: str, files: int) -> tuple:
+    """Register a user and upload ``files`` max-size files; returns (token, names)."""
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        resp = await client.post("/auth/register", json={"email": "bench@example.com", "password": "bench"})
+        if resp.status_code == 400:
+            resp = await client.post("/auth/login", json={"email": "bench@example.com", "password": "bench"})
+        token = resp.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        listing = (await client.get("/files", headers=headers, params={"limit": files})).json()["files"]
+        names = [f["name"] for f in listing]
+        payload = os.urandom(FILE_SIZE)
+        while len(names) < files:
+            resp = await client.post("/file", headers=headers, files={"file": (f"blob{len(names)}.bin", payload)})
+            resp.raise_for_status()
+            names.append(resp.json()["path"])
+        return token, names
+
+
+async def _run_level(url: str, token: str, names, concurrency: int, requests: int) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    counter = iter(range(requests))
+    received = 0
+
+    async def worker(client):
+        nonlocal received
+        for i in counter:
+            async with client.stream("GET", "/file", headers=headers,
+                                     params={"path": names[i % len(names)], "mode": "download"}) as resp:
+                resp.raise_for_status()
+                async for chunk in resp.aiter_raw(1 << 20):
+                    received += len(chunk)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return {"wall": time.perf_counter() - start, "bytes": received}
+
+
+async def main_async(args) -> list:
+    workdir = tempfile.mkdtemp(prefix="rest-api-downloads-")
+    results = []
+    try:
+        for name in args.servers:
+            server = _Server(name, workdir)
+            try:
+                await server.wait_ready()
+                token, names = await _seed(server.url, args.files)
+                for level in args.concurrency:
+                    cpu_before = server.cpu_seconds()
+                    run = await _run_level(server.url, token, names, level, args.requests)
+                    cpu = server.cpu_seconds() - cpu_before
+                    mb = run["bytes"] / (1 << 20)
+                    row = {
+                        "server": name,
+                        "concurrency": level,
+                        "requests": args.requests,
+                        "mb_per_s": round(mb / run["wall"], 1),
+                        "server_cpu_s": round(cpu, 3),
+                        "cpu_ms_per_mb": round(cpu * 1000 / mb, 3) if mb else None,
+                    }
+                    results.append(row)
+                    print(f"{name:<14}{level:>6}{row['mb_per_s']:>10.1f}{row['server_cpu_s']:>10.2f}"
+                          f"{row['cpu_ms_per_mb']:>12.3f}")
+            finally:
+                server.stop()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", nargs="+", choices=sorted(SERVERS), default=list(SERVERS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=128, help="downloads per concurrency level")
+    parser.add_argument("--files", type=int, default=8, help="distinct 10 MB files to download")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    print(f"{'server':<14}{'conc':>6}{'MB/s':>10}{'cpu s':>10}{'cpu ms/MB':>12}")
+    results = asyncio.run(main_async(args))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""Mixed upload / download load test of the file API.
+
+Each concurrency level registers one user per virtual client through
+``/auth/register``. Each user seeds one file of every size. For
+``--seconds`` the clients then loop over a weighted mix of:
+
+    upload     POST /file with a random payload of one of --sizes
+    base64     GET /file?mode=base64 of one of the user's files
+    download   GET /file?mode=download, streamed and discarded
+
+Per level it reports requests/s, MB/s of file content moved, latency
+percentiles per operation, the event-loop lag of the server (how late a 10 ms
+sleep wakes up, sampled throughout) and the peak RSS of the server process.
+
+Where the app runs (--server):
+    uvicorn     a separate uvicorn process, serving main:app; the default
+    inprocess   uvicorn and the clients on one event loop in one process.
+                Lag and RSS then include the client's own work, but nothing
+                crosses a process boundary except the sockets.
+
+The server always gets a scratch upload folder and database, and runs with
+RATE_LIMIT_ENABLED=0 so the per-user 10/minute limits do not cap the load.
+A user about to reach the 1 GB quota is swapped for a freshly registered one.
+Access tokens last 10 minutes, so each account refreshes its token through
+``/auth/refresh`` before it expires.
+
+Needs httpx and psutil, which are not among the API's own dependencies.
+
+Usage (from rest-api):
+    python benchmarks/load.py [--server uvicorn|inprocess] [--concurrency 1 8 32] [--seconds 10]
+                              [--sizes 64k 1m 10m] [--mix upload=1 base64=1 download=2] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+import httpx
+import psutil
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+MAX_FILE_SIZE = 10 * (1 << 20)
+# a user is replaced before its uploads could hit the 1 GB quota
+QUOTA_BUDGET = 900 * (1 << 20)
+LAG_INTERVAL = 0.01
+RSS_INTERVAL = 0.1
+# access tokens expire after 10 minutes (routes/auth.py); refresh well before that
+TOKEN_REFRESH_AGE = 480
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _parse_size(value: str) -> int:
+    units = {"k": 1 << 10, "m": 1 << 20}
+    size = int(float(value[:-1]) * units[value[-1].lower()]) if value[-1].lower() in units else int(value)
+    if not 0 < size <= MAX_FILE_SIZE:
+        raise argparse.ArgumentTypeError(f"sizes must be between 1 byte and 10m, got {value}")
+    return size
+
+
+def _parse_weight(value: str) -> tuple:
+    op, _, weight = value.partition("=")
+    if op not in OPERATIONS:
+        raise argparse.ArgumentTypeError(f"unknown operation {op!r}, use one of {sorted(OPERATIONS)}")
+    return op, float(weight or 1)
+
+
+class LagMonitor:
+    """Records how late the running event loop wakes up from a short sleep."""
+
+    def __init__(self):
+        self.samples = []  # (wall clock, seconds late)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.samples.append((time.time(), max(0.0, loop.time() - start - LAG_INTERVAL)))
+
+
+async def _sample_rss(pid: int, samples: list):
+    proc = psutil.Process(pid)
+    while True:
+        rss = 0
+        for p in [proc, *proc.children(recursive=True)]:
+            try:
+                rss += p.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        samples.append((time.time(), rss))
+        await asyncio.sleep(RSS_INTERVAL)
+
+
+class _Account:
+    """A registered account whose access token is refreshed before it expires."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.refresh_token = None
+        self.access_token = None
+        self.issued = 0.0
+
+    def _take(self, tokens: dict):
+        self.access_token = tokens["access_token"]
+        self.refresh_token = tokens["refresh_token"]
+        self.issued = time.monotonic()
+
+    async def register(self):
+        email = f"load-{time.time_ns()}-{random.getrandbits(32)}@example.com"
+        resp = await self.client.post("/auth/register", json={"email": email, "password": "load"})
+        resp.raise_for_status()
+        self._take(resp.json())
+
+    async def headers(self) -> dict:
+        if time.monotonic() - self.issued > TOKEN_REFRESH_AGE:
+            resp = await self.client.post("/auth/refresh", json={"refresh_token": self.refresh_token})
+            resp.raise_for_status()
+            self._take(resp.json())
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+
+class _User:
+    """A virtual client's current account plus the files it can read back, as (account, path, size)."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.account = None
+        self.stored = 0
+        self.files = defaultdict(list)
+
+    async def register(self):
+        self.account = _Account(self.client)
+        await self.account.register()
+        self.stored = 0
+
+    async def upload(self, payload: bytes) -> int:
+        if self.stored + len(payload) > QUOTA_BUDGET:
+            # files already stored stay readable through the old account
+            await self.register()
+        resp = await self.client.post("/file", headers=await self.account.headers(),
+                                      files={"file": ("load.bin", payload, "application/octet-stream")})
+        resp.raise_for_status()
+        self.stored += len(payload)
+        self.files[len(payload)].append((self.account, resp.json()["path"], len(payload)))
+        return len(payload)
+
+
+async def _upload(user: _User, payload: bytes, rng: random.Random) -> int:
+    return await user.upload(payload)
+
+
+async def _base64(user: _User, payload: bytes, rng: random.Random) -> int:
+    account, path, size = rng.choice(user.files[len(payload)])
+    resp = await user.client.get("/file", headers=await account.headers(), params={"path": path, "mode": "base64"})
+    resp.raise_for_status()
+    return size
+
+
+async def _download(user: _User, payload: bytes, rng: random.Random) -> int:
+    account, path, _ = rng.choice(user.files[len(payload)])
+    received = 0
+    async with user.client.stream("GET", "/file", headers=await account.headers(),
+                                  params={"path": path, "mode": "download"}) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.aiter_raw(1 << 20):
+            received += len(chunk)
+    return received
+
+
+OPERATIONS = {"upload": _upload, "base64": _base64, "download": _download}
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def _latency_summary(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    if not ordered:
+        return {}
+    return {f"{name}_ms": round(value * 1000, 2) for name, value in [
+        ("p50", statistics.median(ordered)), ("p95", _percentile(ordered, 0.95)),
+        ("p99", _percentile(ordered, 0.99)), ("max", ordered[-1])]}
+
+
+async def _run_level(client: httpx.AsyncClient, concurrency: int, args) -> dict:
+    payloads = [os.urandom(size) for size in args.sizes]
+    users = [_User(client) for _ in range(concurrency)]
+    for user in users:
+        await user.register()
+        for payload in payloads:
+            await user.upload(payload)
+
+    ops = [op for op, _ in args.mix]
+    weights = [weight for _, weight in args.mix]
+    latencies = defaultdict(list)
+    errors = Counter()
+    moved = 0
+
+    async def client_loop(user: _User, rng: random.Random, deadline: float):
+        nonlocal moved
+        while time.perf_counter() < deadline:
+            op = rng.choices(ops, weights)[0]
+            start = time.perf_counter()
+            try:
+                transferred = await OPERATIONS[op](user, rng.choice(payloads), rng)
+            except httpx.HTTPStatusError as ex:
+                errors[f"{op} {ex.response.status_code}"] += 1
+                continue
+            except httpx.TransportError as ex:
+                errors[f"{op} {type(ex).__name__}"] += 1
+                continue
+            latencies[op].append(time.perf_counter() - start)
+            moved += transferred
+
+    window_start = time.time()
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    await asyncio.gather(*(client_loop(user, random.Random(i), deadline) for i, user in enumerate(users)))
+    wall = time.perf_counter() - start
+    completed = sum(len(values) for values in latencies.values())
+    return {
+        "concurrency": concurrency,
+        "window": [window_start, time.time()],
+        "requests": completed,
+        "errors": dict(errors),
+        "rps": round(completed / wall, 1),
+        "mb_per_s": round(moved / (1 << 20) / wall, 1),
+        "operations": {op: {"count": len(values), **_latency_summary(values)} for op, values in latencies.items()},
+    }
+
+
+async def drive(url: str, args) -> list:
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=url, timeout=300, limits=limits) as client:
+        return [await _run_level(client, level, args) for level in args.concurrency]
+
+
+def _worker_args(args) -> list:
+    return ["--seconds", str(args.seconds), "--concurrency", *map(str, args.concurrency),
+            "--sizes", *map(str, args.sizes), "--mix", *(f"{op}={weight}" for op, weight in args.mix)]
+
+
+async def _serve(port: int, drive_args=None):
+    """Body of the child process: serve main:app with a lag monitor, and drive it too when in-process."""
+    import uvicorn
+
+    sys.path.insert(0, SRC_DIR)
+    import main
+
+    monitor = LagMonitor()
+    monitor_task = asyncio.create_task(monitor.run())
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning",
+                                           access_log=False))
+    serve_task = asyncio.create_task(server.serve())
+    levels = []
+    try:
+        if drive_args is None:
+            # uvicorn re-raises SIGTERM once it has shut down, so the parent asks for the exit by closing stdin
+            await asyncio.to_thread(sys.stdin.read)
+        else:
+            while not server.started:
+                await asyncio.sleep(0.05)
+            levels = await drive(f"http://127.0.0.1:{port}", drive_args)
+    finally:
+        server.should_exit = True
+        await serve_task
+    monitor_task.cancel()
+    print(json.dumps({"levels": levels, "lag": monitor.samples}))
+
+
+async def _wait_ready(url: str, proc: asyncio.subprocess.Process, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if proc.returncode is not None:
+                raise RuntimeError("server exited during startup")
+            try:
+                if (await client.get(f"{url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def main_async(args) -> list:
+    workdir = tempfile.mkdtemp(prefix="rest-api-load-")
+    env = dict(os.environ, RATE_LIMIT_ENABLED="0", UPLOAD_FOLDER=os.path.join(workdir, "uploads"))
+    port = _free_port()
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve-port", str(port)]
+    if args.server == "inprocess":
+        cmd += ["--drive", *_worker_args(args)]
+    rss = []
+    try:
+        proc = await asyncio.create_subprocess_exec(*cmd, cwd=workdir, env=env, stdin=subprocess.PIPE,
+                                                    stdout=subprocess.PIPE)
+        rss_task = asyncio.create_task(_sample_rss(proc.pid, rss))
+        try:
+            if args.server == "uvicorn":
+                url = f"http://127.0.0.1:{port}"
+                await _wait_ready(url, proc)
+                levels = await drive(url, args)
+            proc.stdin.close()
+            out, _ = await proc.communicate()
+        finally:
+            rss_task.cancel()
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        if proc.returncode != 0:
+            raise RuntimeError(f"server process exited with {proc.returncode}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    child = json.loads(out.decode().strip().splitlines()[-1])
+    if args.server == "inprocess":
+        levels = child["levels"]
+    for level in levels:
+        start, end = level.pop("window")
+        lag = sorted(value for ts, value in child["lag"] if start <= ts <= end)
+        level["loop_lag_ms"] = _latency_summary(lag)
+        level["peak_rss_mb"] = round(max((value for ts, value in rss if start <= ts <= end), default=0) / (1 << 20), 1)
+    return levels
+
+
+def _print_level(level: dict):
+    lag = level["loop_lag_ms"]
+    print(f"\nconcurrency {level['concurrency']}: {level['rps']:.1f} req/s, {level['mb_per_s']:.1f} MB/s, "
+          f"peak RSS {level['peak_rss_mb']:.0f} MB")
+    print(f"  event-loop lag: p50 {lag.get('p50_ms', 0):.1f} ms, p99 {lag.get('p99_ms', 0):.1f} ms, "
+          f"max {lag.get('max_ms', 0):.1f} ms")
+    print(f"  {'operation':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, stats in sorted(level["operations"].items()):
+        print(f"  {op:<10}{stats['count']:>8}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+              f"{stats['max_ms']:>10.1f}")
+    for error, count in sorted(level["errors"].items()):
+        print(f"  error {error}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["uvicorn", "inprocess"], default="uvicorn")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=10.0, help="measured duration per concurrency level")
+    parser.add_argument("--sizes", type=_parse_size, nargs="+", default=[64 << 10, 1 << 20, MAX_FILE_SIZE],
+                        help="file sizes, e.g. 64k 1m 10m; each request picks one")
+    parser.add_argument("--mix", type=_parse_weight, nargs="+",
+                        default=[("upload", 1.0), ("base64", 1.0), ("download", 2.0)],
+                        help="operation=weight pairs")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--serve-port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--drive", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_port:
+        asyncio.run(_serve(args.serve_port, args if args.drive else None))
+        return
+
+    levels = asyncio.run(main_async(args))
+    for level in levels:
+        _print_level(level)
+    if args.json_path:
+        config = {"server": args.server, "concurrency": args.concurrency, "seconds": args.seconds,
+                  "sizes": args.sizes, "mix": dict(args.mix)}
+        with open(args.json_path, "w") as f:
+            json.dump({"config": config, "cpus": os.cpu_count(), "results": levels}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
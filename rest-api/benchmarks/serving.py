@@ -0,0 +1,195 @@
+"""Requests per second of the API under different process / event loop setups.
+
+Each configuration is started in a scratch directory and driven with a small
+keep-alive HTTP/1.1 client (raw asyncio streams, so the client costs far less
+CPU than the server) on two routes: ``/health`` (framework overhead only) and
+an authenticated ``GET /files`` (JWT check plus a SQLite read).
+
+    uvicorn          python -m uvicorn, asyncio loop and h11 parser: what main.py runs
+                     when uvloop and httptools are not installed
+    uvicorn-uvloop   the same single process with uvloop and httptools
+    serve-<N>        serve.py with N workers (gunicorn + uvicorn workers when installed)
+
+The client shares the machine with the server: on a host with few cores the
+multi-worker rows mostly show the cost of the extra processes, not the scaling.
+
+Usage (from rest-api):
+    python benchmarks/serving.py [--configs uvicorn uvicorn-uvloop serve-1 serve-4] [--connections 64]
+                                 [--seconds 10] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _command(config: str, port: int) -> tuple:
+    uvicorn = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning", "--no-access-log"]
+    if config == "uvicorn":
+        return uvicorn + ["--loop", "asyncio", "--http", "h11"], {}
+    if config == "uvicorn-uvloop":
+        return uvicorn + ["--loop", "uvloop", "--http", "httptools"], {}
+    if config.startswith("serve-"):
+        return [sys.executable, os.path.join(SRC_DIR, "serve.py")], {
+            "APP_HOST": "127.0.0.1", "APP_PORT": str(port), "WEB_CONCURRENCY": config.split("-", 1)[1]}
+    raise ValueError(f"unknown configuration {config!r}")
+
+
+class _Server:
+    def __init__(self, config: str, workdir: str):
+        self.port = _free_port()
+        cmd, extra_env = _command(config, self.port)
+        env = dict(os.environ, PYTHONPATH=SRC_DIR, RATE_LIMIT_ENABLED="0",
+                   UPLOAD_FOLDER=os.path.join(workdir, "uploads"), **extra_env)
+        self.proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    async def wait_ready(self, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                status, _ = await _request_once(self.port, "/health")
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            await asyncio.sleep(0.2)
+        raise RuntimeError("server did not start")
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+async def _read_response(reader) -> tuple:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.split(b"\r\n")
+    status = int(lines[0].split()[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    body = await reader.readexactly(length) if length else b""
+    return status, body
+
+
+def _request_bytes(path: str, headers: dict | None = None, method: str = "GET", body: bytes = b"") -> bytes:
+    lines = [f"{method} {path} HTTP/1.1", "Host: bench"]
+    lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    if body:
+        lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+
+async def _request_once(port: int, path: str, **kwargs) -> tuple:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(_request_bytes(path, **kwargs))
+        await writer.drain()
+        return await _read_response(reader)
+    finally:
+        writer.close()
+
+
+async def _token(port: int) -> str:
+    credentials = json.dumps({"email": "serving@example.com", "password": "bench"}).encode()
+    status, body = await _request_once(port, "/auth/register", method="POST", body=credentials)
+    if status != 200:
+        status, body = await _request_once(port, "/auth/login", method="POST", body=credentials)
+    return json.loads(body)["access_token"]
+
+
+async def _load(port: int, request: bytes, connections: int, seconds: float) -> dict:
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def connection():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                status, _ = await _read_response(reader)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(connections)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+async def main_async(args) -> list:
+    results = []
+    for config in args.configs:
+        workdir = tempfile.mkdtemp(prefix="rest-api-serving-")
+        server = _Server(config, workdir)
+        try:
+            await server.wait_ready()
+            token = await _token(server.port)
+            routes = {
+                "/health": _request_bytes("/health"),
+                "/files": _request_bytes("/files?limit=10", {"Authorization": f"Bearer {token}"}),
+            }
+            for route, request in routes.items():
+                await _load(server.port, request, args.connections, 1.0)  # warm up
+                row = {"config": config, "route": route,
+                       **await _load(server.port, request, args.connections, args.seconds)}
+                results.append(row)
+                print(f"{config:<16}{route:<10}{row['rps']:>10.1f}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                      f"{row['errors']:>8}")
+        finally:
+            server.stop()
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", nargs="+", default=["uvicorn", "uvicorn-uvloop", "serve-1", "serve-4"])
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10.0, help="measured duration per route")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args()
+
+    print(f"{'config':<16}{'route':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    results = asyncio.run(main_async(args))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"config": vars(args), "cpus": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""POST /file throughput and threadpool calls per upload, for one or more source trees.
+
+Each tree is imported in a fresh interpreter that serves the API with uvicorn
+on an in-process event loop, so every call into a worker thread can be
+counted: anyio's ``to_thread.run_sync`` (Starlette's run_in_threadpool,
+UploadFile I/O) and ``loop.run_in_executor`` (aiofiles). Max-size (10 MB)
+files are uploaded from concurrent clients on the same loop; the report gives
+MB/s and threadpool calls per upload, including the ones the multipart parser
+makes while spooling the request.
+
+To compare against the previous writer, check it out next to this tree:
+    git worktree add /tmp/before <commit>
+    python benchmarks/uploads.py --src before=/tmp/before/rest-api/src --src after=src
+
+Usage (from rest-api):
+    python benchmarks/uploads.py [--src [label=]path ...] [--concurrency 1 8 32] [--requests 48] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+FILE_SIZE = 10 * (1 << 20)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _count_threadpool_calls(counter: dict):
+    import anyio.to_thread
+
+    run_sync = anyio.to_thread.run_sync
+
+    async def counted_run_sync(*args, **kwargs):
+        counter["calls"] += 1
+        return await run_sync(*args, **kwargs)
+
+    anyio.to_thread.run_sync = counted_run_sync
+
+    run_in_executor = asyncio.BaseEventLoop.run_in_executor
+
+    def counted_run_in_executor(self, *args, **kwargs):
+        counter["calls"] += 1
+        return run_in_executor(self, *args, **kwargs)
+
+    asyncio.BaseEventLoop.run_in_executor = counted_run_in_executor
+
+
+async def _upload_level(url: str, concurrency: int, requests: int, payload: bytes, counter: dict) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+        # a fresh user per level, so the 1 GB quota is never the limit
+        email = f"bench{concurrency}-{time.time_ns()}@example.com"
+        resp = await client.post("/auth/register", json={"email": email, "password": "bench"})
+        resp.raise_for_status()
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    counter_iter = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+
+        async def worker():
+            for i in counter_iter:
+                resp = await client.post("/file", headers=headers, files={"file": (f"blob{i}.bin", payload)})
+                resp.raise_for_status()
+
+        calls_before = counter["calls"]
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+        calls = counter["calls"] - calls_before
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "mb_per_s": round(requests * len(payload) / (1 << 20) / wall, 1),
+        "threadpool_calls_per_upload": round(calls / requests, 1),
+    }
+
+
+async def _serve_and_measure(args) -> list:
+    import uvicorn
+
+    counter = {"calls": 0}
+    _count_threadpool_calls(counter)
+    import main
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    payload = os.urandom(FILE_SIZE)
+    try:
+        return [await _upload_level(f"http://127.0.0.1:{port}", level, args.requests, payload, counter)
+                for level in args.concurrency]
+    finally:
+        server.should_exit = True
+        await task
+
+
+def run_worker(args) -> list:
+    sys.path.insert(0, args.worker_src)
+    return asyncio.run(_serve_and_measure(args))
+
+
+def _run_tree(label: str, src: str, args) -> list:
+    workdir = tempfile.mkdtemp(prefix="rest-api-uploads-")
+    try:
+        env = dict(os.environ, RATE_LIMIT_ENABLED="0", UPLOAD_FOLDER=os.path.join(workdir, "uploads"))
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker-src", os.path.abspath(src),
+               "--requests", str(args.requests), "--concurrency", *map(str, args.concurrency)]
+        proc = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{label} run failed:\n{proc.stderr}")
+        return [dict(row, tree=label) for row in json.loads(proc.stdout.strip().splitlines()[-1])]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _parse_src(value: str) -> tuple:
+    label, sep, path = value.partition("=")
+    return (label, path) if sep else (os.path.basename(os.path.dirname(os.path.abspath(value))) or value, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", type=_parse_src, action="append", help="[label=]path of a rest-api src tree")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=48, help="uploads per concurrency level")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--worker-src", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_src:
+        print(json.dumps(run_worker(args)))
+        return
+
+    trees = args.src or [("current", SRC_DIR)]
+    print(f"{'tree':<12}{'conc':>6}{'MB/s':>10}{'calls/upload':>14}")
+    results = []
+    for label, src in trees:
+        for row in _run_tree(label, src, args):
+            results.append(row)
+            print(f"{label:<12}{row['concurrency']:>6}{row['mb_per_s']:>10.1f}{row['threadpool_calls_per_upload']:>14.1f}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"config": {"concurrency": args.concurrency, "requests": args.requests,
+                                  "trees": dict(trees)}, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import tarfile
+import time
+import zipfile
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+
+import compression
+from downloads import content_stream
+
+FORMATS = {"zip": "application/zip", "tar": "application/x-tar"}
+# archive bytes are handed to the server once this much has piled up
+_FLUSH_SIZE = 1 << 20
+
+
+class _Sink:
+    """Write-only file object collecting what zipfile writes until it is taken.
+
+    It has no seek or tell, so zipfile falls back to streaming mode: every
+    member gets a data descriptor after its data instead of a header patched
+    afterwards, and nothing written has to be revisited.
+    """
+
+    def __init__(self):
+        self._pieces = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._pieces.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        out = b"".join(self._pieces)
+        self._pieces, self.size = [], 0
+        return out
+
+
+async def zip_stream(items):
+    """Zip of ``items``, (path, catalog entry) pairs, produced as it is sent.
+
+    Compressible files are deflated, everything else is stored. Memory is
+    bounded by one read chunk plus ``_FLUSH_SIZE`` of output.
+    """
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, "w")
+    for path, entry in items:
+        info = zipfile.ZipInfo(entry["name"], date_time=time.localtime(entry["mtime"])[:6])
+        info.external_attr = 0o644 << 16
+        deflate = compression.is_compressible(entry["content_type"], entry["size"])
+        info.compress_type = zipfile.ZIP_DEFLATED if deflate else zipfile.ZIP_STORED
+        with archive.open(info, "w") as member:
+            async for chunk in content_stream(path, entry, None):
+                if deflate:
+                    await run_in_threadpool(member.write, chunk)
+                else:
+                    member.write(chunk)
+                if sink.size >= _FLUSH_SIZE:
+                    yield sink.take()
+        yield sink.take()
+    archive.close()
+    yield sink.take()
+
+
+async def tar_stream(items):
+    """POSIX tar of ``items``, (path, catalog entry) pairs; the catalog sizes go into the headers."""
+    for path, entry in items:
+        info = tarfile.TarInfo(entry["name"])
+        info.size = entry["size"]
+        info.mtime = int(entry["mtime"])
+        info.mode = 0o644
+        yield info.tobuf(format=tarfile.PAX_FORMAT)
+        written = 0
+        async for chunk in content_stream(path, entry, None):
+            written += len(chunk)
+            yield chunk
+        if written != entry["size"]:
+            # the header is already out, so the only honest thing left is to break the stream
+            raise RuntimeError(f"{entry['name']} does not match its catalog size")
+        yield b"\0" * (-written % tarfile.BLOCKSIZE)
+    yield b"\0" * (2 * tarfile.BLOCKSIZE)
+
+
+def archive_stream(fmt: str, items: list[tuple[Path, dict]]):
+    return zip_stream(items) if fmt == "zip" else tar_stream(items)
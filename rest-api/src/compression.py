@@ -0,0 +1,212 @@
+import os
+import zlib
+
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+# bounded decompression (process(output_buffer_limit=...), can_accept_more_data) needs brotli >= 1.2;
+# with an older one br is simply not offered
+if brotli is not None and not hasattr(brotli.Decompressor(), "can_accept_more_data"):
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+# preferred first when a client accepts several with the same q-value
+ENCODINGS = [name for name, module in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if module is not None]
+
+# encoding used to store compressible uploads on disk, empty keeps them as sent
+STORE_ENCODING = os.getenv("STORE_COMPRESSED", "")
+if STORE_ENCODING and STORE_ENCODING not in ENCODINGS:
+    raise RuntimeError(f"STORE_COMPRESSED={STORE_ENCODING!r} is not available, choose one of {ENCODINGS}")
+
+_CODEC_ERRORS = (zlib.error,) + tuple(
+    error for error in (getattr(brotli, "error", None), getattr(zstandard, "ZstdError", None)) if error
+)
+
+MIN_COMPRESS_SIZE = 1024
+_COMPRESSIBLE_TYPES = {
+    "application/json", "application/xml", "application/javascript", "application/x-ndjson",
+    "application/x-yaml", "application/yaml", "application/sql", "application/csv", "image/svg+xml",
+}
+
+
+class DecompressedTooLarge(ValueError):
+    pass
+
+
+def is_compressible(content_type: str | None, size: int | None = None) -> bool:
+    """Whether content of this type (and ``size``, when known) is worth compressing."""
+    if (size is not None and size < MIN_COMPRESS_SIZE) or not content_type:
+        return False
+    content_type = content_type.split(";")[0].strip().lower()
+    return content_type.startswith("text/") or content_type in _COMPRESSIBLE_TYPES
+
+
+def negotiate(accept_encoding: str | None, available=None) -> str | None:
+    """Best encoding from ``available`` allowed by an Accept-Encoding header, or None for identity."""
+    available = ENCODINGS if available is None else available
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for name in available:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "gzip":
+            obj = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self._compress, self._flush = obj.compress, obj.flush
+        elif encoding == "br":
+            obj = brotli.Compressor(quality=5)
+            self._compress, self._flush = obj.process, obj.finish
+        elif encoding == "zstd":
+            obj = zstandard.ZstdCompressor(level=3).compressobj()
+            self._compress, self._flush = obj.compress, obj.flush
+        else:
+            raise ValueError(f"unsupported encoding {encoding!r}")
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def flush(self) -> bytes:
+        return self._flush()
+
+
+class _Decompressor:
+    """Streaming decoder that refuses to produce more than ``limit`` bytes in total.
+
+    Output is produced in bounded steps, so a small, highly compressed input
+    cannot expand to more than ``limit`` bytes in memory.
+    """
+
+    _STEP = 1 << 16
+
+    def __init__(self, encoding: str, limit: int):
+        self.encoding = encoding
+        self.limit = limit
+        self.total = 0
+        if encoding == "gzip":
+            self._obj = zlib.decompressobj(31)
+        elif encoding == "br":
+            self._obj = brotli.Decompressor()
+        elif encoding == "zstd":
+            self._pieces = []
+            self._expected = None  # content size from the frame header, when the encoder wrote one
+            self._obj = zstandard.ZstdDecompressor().stream_writer(self, write_size=self._STEP)
+        else:
+            raise ValueError(f"unsupported encoding {encoding!r}")
+
+    def _count(self, data: bytes) -> bytes:
+        self.total += len(data)
+        if self.total > self.limit:
+            raise DecompressedTooLarge(f"decompressed size exceeds {self.limit} bytes")
+        return data
+
+    # zstandard stream_writer sink
+    def write(self, data) -> int:
+        self._pieces.append(self._count(bytes(data)))
+        return len(data)
+
+    def feed(self, data: bytes) -> bytes:
+        try:
+            return self._feed(data)
+        except _CODEC_ERRORS as ex:
+            raise ValueError(f"invalid {self.encoding} stream") from ex
+
+    def finish(self) -> bytes:
+        """Remaining output; raises ValueError if the stream was truncated."""
+        try:
+            return self._finish()
+        except _CODEC_ERRORS as ex:
+            raise ValueError(f"invalid {self.encoding} stream") from ex
+
+    def _feed(self, data: bytes) -> bytes:
+        out = []
+        if self.encoding == "gzip":
+            out.append(self._count(self._obj.decompress(data, self._STEP)))
+            while self._obj.unconsumed_tail:
+                out.append(self._count(self._obj.decompress(self._obj.unconsumed_tail, self._STEP)))
+        elif self.encoding == "br":
+            out.append(self._count(self._obj.process(data, output_buffer_limit=self._STEP)))
+            while not self._obj.can_accept_more_data():
+                out.append(self._count(self._obj.process(b"", output_buffer_limit=self._STEP)))
+        else:
+            if self._expected is None and data:
+                try:
+                    self._expected = zstandard.frame_content_size(data)
+                except zstandard.ZstdError:
+                    self._expected = -1
+            self._obj.write(data)
+            out, self._pieces = self._pieces, []
+        return b"".join(out)
+
+    def _finish(self) -> bytes:
+        if self.encoding == "gzip":
+            tail = self._count(self._obj.flush())
+            if not self._obj.eof:
+                raise ValueError("truncated gzip stream")
+            return tail
+        if self.encoding == "br":
+            out = []
+            while not self._obj.is_finished():
+                piece = self._count(self._obj.process(b"", output_buffer_limit=self._STEP))
+                if not piece:
+                    raise ValueError("truncated brotli stream")
+                out.append(piece)
+            return b"".join(out)
+        self._obj.flush()
+        out, self._pieces = self._pieces, []
+        if self._expected is not None and self._expected >= 0 and self.total != self._expected:
+            raise ValueError("truncated zstd stream")
+        return b"".join(out)
+
+
+def compressor(encoding: str) -> _Compressor:
+    return _Compressor(encoding)
+
+
+def decompressor(encoding: str, limit: int) -> _Decompressor:
+    return _Decompressor(encoding, limit)
+
+
+async def decoded(chunks, encoding: str, limit: int):
+    """Decode an async iterable of ``encoding`` bytes; the codec work runs in the threadpool."""
+    decoder = decompressor(encoding, limit)
+    async for chunk in chunks:
+        data = await run_in_threadpool(decoder.feed, chunk)
+        if data:
+            yield data
+    data = await run_in_threadpool(decoder.finish)
+    if data:
+        yield data
+
+
+async def encoded(chunks, encoding: str):
+    """Compress an async iterable of bytes with ``encoding``, one threadpool call per chunk."""
+    encoder = compressor(encoding)
+    async for chunk in chunks:
+        data = await run_in_threadpool(encoder.compress, chunk)
+        if data:
+            yield data
+    yield await run_in_threadpool(encoder.flush)
@@ -1,10 +1,20 @@
 import sqlite3
 import os
+import threading
+
+# The app shares one connection between the event loop and the threadpool. A
+# write transaction (execute ... commit or rollback) holds this lock, so one
+# thread's rollback can never discard another thread's uncommitted writes.
+write_lock = threading.Lock()
 
 
 def init_db():
     os.makedirs("db", exist_ok=True)
     conn = sqlite3.connect("db/users.db", check_same_thread=False)
+    # serve.py runs several worker processes on this file: with WAL readers do not
+    # block the writer, and the connect timeout makes writers queue for the lock
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     conn.execute(
         """CREATE TABLE IF NOT EXISTS users (
             id TEXT PRIMARY KEY,
@@ -16,5 +26,27 @@ def init_db():
             refresh_exp INTEGER
         )"""
     )
+    # /auth/refresh looks users up by refresh token
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_refresh_token ON users(refresh_token)")
+    # per-user file catalog; the primary key serves lookups, listings and quota sums
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS files (
+            user_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            sha256 TEXT,
+            mtime_ns INTEGER NOT NULL,
+            content_type TEXT,
+            encoding TEXT,
+            PRIMARY KEY (user_id, name)
+        ) WITHOUT ROWID"""
+    )
+    # encoding: compression of the stored bytes (NULL = stored as uploaded); size is always the logical size
+    if "encoding" not in {row[1] for row in conn.execute("PRAGMA table_info(files)")}:
+        try:
+            conn.execute("ALTER TABLE files ADD COLUMN encoding TEXT")
+        except sqlite3.OperationalError as ex:
+            if "duplicate column" not in str(ex):  # another worker migrated first
+                raise
     conn.commit()
     return conn
@@ -0,0 +1,83 @@
+import os
+from pathlib import Path
+from urllib.parse import quote
+
+import aiofiles
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+import compression
+
+# Set when nginx serves the upload folder from an internal location (e.g. "/protected-uploads"):
+# the response then only carries X-Accel-Redirect and nginx sends the file itself with sendfile(2).
+ACCEL_REDIRECT_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX", "")
+CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 1 << 20))
+# read size when the content goes through a codec: each read is one threadpool hop for the codec
+# and a decoded chunk can be far larger than what was read
+TRANSCODE_READ_SIZE = 1 << 16
+
+
+class DownloadResponse(FileResponse):
+    """FileResponse that lets the server do the copying when it can.
+
+    Servers advertising the ASGI ``http.response.pathsend`` extension (Granian,
+    for one) are handed just the path and send the file with sendfile(2).
+    Elsewhere the file is streamed in 1 MiB chunks rather than 64 KiB, so a
+    10 MB download takes 10 threadpool reads and sends instead of 160.
+    """
+
+    chunk_size = CHUNK_SIZE
+
+
+async def file_chunks(path: Path, size: int = TRANSCODE_READ_SIZE):
+    async with aiofiles.open(path, "rb") as f:
+        while chunk := await f.read(size):
+            yield chunk
+
+
+def content_stream(path: Path, entry: dict, encoding: str | None):
+    """The logical content of a catalogued file, re-encoded as ``encoding`` (None for identity)."""
+    stream = file_chunks(path)
+    if entry["encoding"]:
+        # the logical size bounds decoding, in case the stored file was tampered with
+        stream = compression.decoded(stream, entry["encoding"], entry["size"])
+    if encoding:
+        stream = compression.encoded(stream, encoding)
+    return stream
+
+
+def download_response(path: Path, relative: str, entry: dict, accept_encoding: str | None = None) -> Response:
+    """Attachment response for ``path``; ``relative`` is its path below the upload folder.
+
+    ``entry`` is the catalog row of the file. A file stored compressed is sent
+    as it is on disk when the client accepts its encoding, and decoded on the
+    fly otherwise; an uncompressed file of a compressible type is compressed
+    on the fly when the client accepts one of our encodings.
+    """
+    disposition = f"attachment; filename*=utf-8''{quote(path.name)}"
+    vary = {"Vary": "Accept-Encoding"}
+    stored = entry["encoding"]
+    if stored and compression.negotiate(accept_encoding, [stored]) == stored:
+        return DownloadResponse(path=path.as_posix(), media_type="application/octet-stream", filename=path.name,
+                                headers={"Content-Encoding": stored, **vary})
+
+    encoding = None
+    if not ACCEL_REDIRECT_PREFIX and compression.is_compressible(entry["content_type"], entry["size"]):
+        encoding = compression.negotiate(accept_encoding)
+    if stored or encoding:
+        headers = {"Content-Disposition": disposition, **vary}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return StreamingResponse(content_stream(path, entry, encoding), media_type="application/octet-stream",
+                                 headers=headers)
+
+    if ACCEL_REDIRECT_PREFIX:
+        # nginx applies its own gzip settings to what it serves
+        return Response(
+            headers={
+                "X-Accel-Redirect": f"{ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(relative)}",
+                "Content-Disposition": disposition,
+            },
+            media_type="application/octet-stream",
+        )
+    return DownloadResponse(path=path.as_posix(), media_type="application/octet-stream", filename=path.name,
+                            headers=vary)
@@ -0,0 +1,167 @@
+import hashlib
+import mimetypes
+import os
+import sqlite3
+import time
+
+from database import write_lock
+from file_operations import destination
+from upload_writer import is_temp_name
+
+# size of a row whose upload is still being written
+PENDING = -1
+# reservations older than this are left over from a crashed upload
+_STALE_PENDING_NS = 3600 * 10 ** 9
+_HASH_BLOCK = 1 << 20
+
+
+def content_type_for(name: str, declared: str | None = None) -> str:
+    if declared and declared != "application/octet-stream":
+        return declared
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def _candidates(name: str):
+    yield name
+    stem, suffix = os.path.splitext(name)
+    stamp = int(time.time())
+    yield f"{stem}_{stamp}{suffix}"
+    i = 1
+    while True:
+        yield f"{stem}_{stamp}_{i}{suffix}"
+        i += 1
+
+
+def reserve_name(conn: sqlite3.Connection, user_id: str, name: str) -> str:
+    """Claim ``name`` for a new upload, or ``<stem>_<time><suffix>`` if it is taken.
+
+    The claim is an INSERT against the (user_id, name) primary key, so two
+    concurrent uploads of the same name can never pick the same file.
+    Blocking; async callers run it (and ``finish``, ``discard``) in the threadpool.
+    """
+    with write_lock:
+        for candidate in _candidates(name):
+            try:
+                conn.execute(
+                    "INSERT INTO files (user_id, name, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                    (user_id, candidate, PENDING, time.time_ns()),
+                )
+                conn.commit()
+                return candidate
+            except sqlite3.IntegrityError:
+                conn.rollback()
+
+
+def finish(conn: sqlite3.Connection, user_id: str, name: str, size: int, sha256: str, mtime_ns: int,
+           content_type: str, encoding: str | None = None):
+    """Record a completed upload; ``size`` and ``sha256`` describe the content before any at-rest encoding."""
+    with write_lock:
+        conn.execute(
+            "UPDATE files SET size=?, sha256=?, mtime_ns=?, content_type=?, encoding=? WHERE user_id=? AND name=?",
+            (size, sha256, mtime_ns, content_type, encoding, user_id, name),
+        )
+        conn.commit()
+
+
+def discard(conn: sqlite3.Connection, user_id: str, name: str):
+    with write_lock:
+        conn.execute("DELETE FROM files WHERE user_id=? AND name=?", (user_id, name))
+        conn.commit()
+
+
+def _entry(row) -> dict:
+    name, size, sha256, mtime_ns, content_type = row
+    return {"name": name, "size": size, "sha256": sha256, "mtime": mtime_ns / 1e9, "content_type": content_type}
+
+
+def _stored_entry(row) -> dict:
+    entry = _entry(row[:5])
+    entry["encoding"] = row[5]
+    return entry
+
+
+def get(conn: sqlite3.Connection, user_id: str, name: str) -> dict | None:
+    """Metadata of a completely uploaded file, including its at-rest ``encoding``, or None."""
+    row = conn.execute(
+        "SELECT name, size, sha256, mtime_ns, content_type, encoding FROM files "
+        "WHERE user_id=? AND name=? AND size>=0",
+        (user_id, name),
+    ).fetchone()
+    return _stored_entry(row) if row else None
+
+
+def all_files(conn: sqlite3.Connection, user_id: str) -> list:
+    """Every completely uploaded file of a user in name order, as returned by ``get``."""
+    rows = conn.execute(
+        "SELECT name, size, sha256, mtime_ns, content_type, encoding FROM files "
+        "WHERE user_id=? AND size>=0 ORDER BY name",
+        (user_id,),
+    ).fetchall()
+    return [_stored_entry(row) for row in rows]
+
+
+def list_files(conn: sqlite3.Connection, user_id: str, limit: int, after: str | None = None) -> list:
+    """Up to ``limit`` files in name order, starting after the name ``after``."""
+    rows = conn.execute(
+        "SELECT name, size, sha256, mtime_ns, content_type FROM files "
+        "WHERE user_id=? AND name>? AND size>=0 ORDER BY name LIMIT ?",
+        (user_id, after or "", limit),
+    ).fetchall()
+    return [_entry(row) for row in rows]
+
+
+def quota_used(conn: sqlite3.Connection, user_id: str) -> int:
+    row = conn.execute("SELECT COALESCE(SUM(size), 0) FROM files WHERE user_id=? AND size>=0", (user_id,)).fetchone()
+    return row[0]
+
+
+def _sha256_of(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def sync_with_disk(conn: sqlite3.Connection):
+    """Bring the catalog in line with the upload folder at startup.
+
+    Files uploaded before the catalog existed are indexed, rows whose file is
+    gone are dropped, and stale reservations and temporary files of crashed
+    uploads are removed.
+    """
+    stale_before = time.time_ns() - _STALE_PENDING_NS
+    stale = conn.execute("SELECT user_id, name FROM files WHERE size=? AND mtime_ns<?",
+                         (PENDING, stale_before)).fetchall()
+    for user_id, name in stale:
+        (destination() / user_id / name).unlink(missing_ok=True)
+        conn.execute("DELETE FROM files WHERE user_id=? AND name=?", (user_id, name))
+
+    known = set(conn.execute("SELECT user_id, name FROM files").fetchall())
+    on_disk = set()
+    for user_dir in destination().iterdir():
+        if not user_dir.is_dir():
+            continue
+        for entry in os.scandir(user_dir):
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            if is_temp_name(entry.name):
+                # recent ones may belong to an upload still running in another worker
+                if entry.stat(follow_symlinks=False).st_mtime_ns < stale_before:
+                    os.unlink(entry.path)
+                continue
+            key = (user_dir.name, entry.name)
+            on_disk.add(key)
+            if key in known:
+                continue
+            st = entry.stat(follow_symlinks=False)
+            conn.execute(
+                "INSERT OR IGNORE INTO files (user_id, name, size, sha256, mtime_ns, content_type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_dir.name, entry.name, st.st_size, _sha256_of(entry.path), st.st_mtime_ns,
+                 content_type_for(entry.name)),
+            )
+
+    for user_id, name in known - on_disk:
+        conn.execute("DELETE FROM files WHERE user_id=? AND name=? AND size>=0", (user_id, name))
+    conn.commit()
@@ -1,14 +1,18 @@
 from pathlib import Path
+import os
 import re
 import time
 
 _CURRENT_SCRIPT_FOLDER = Path(__file__).parent.resolve()
-_UPLOAD_FOLDER = (_CURRENT_SCRIPT_FOLDER / "uploads").resolve()
+_UPLOAD_FOLDER = Path(os.getenv("UPLOAD_FOLDER", _CURRENT_SCRIPT_FOLDER / "uploads")).resolve()
 _UPLOAD_FOLDER.mkdir(exist_ok=True)
 
 _MAX_SIZE = (1 << 20) * 10
 _RX = re.compile(r"[^A-Za-z0-9_.-]")
 
+# user folders known to exist, so uploads do not mkdir on every request
+_user_folders = set()
+
 def safe_file_name(path: str) -> str:
     try:
         name_of_path = Path(path).name
@@ -38,7 +42,6 @@ def validate(path: str) -> Path:
 
 def validate_user_file(path: str, user_id: str) -> Path:
     user_folder = destination() / user_id
-    user_folder.mkdir(parents=True, exist_ok=True)
 
     save_to = (user_folder / path).resolve()
     try:
@@ -52,12 +55,12 @@ def change(relative_path: str) -> str:
     return relative_path.replace("../", "").lstrip("/")
 
 def get_user_folder(user_id: str) -> Path:
-    folder = destination() / user_id
-    folder.mkdir(parents=True, exist_ok=True)
-    return folder
+    return destination() / user_id
 
 
-def get_user_quota_used(user_id: str) -> int:
+def ensure_user_folder(user_id: str) -> Path:
     folder = get_user_folder(user_id)
-    total = sum(f.stat().st_size for f in folder.glob("*") if f.is_file())
-    return total
+    if user_id not in _user_folders:
+        folder.mkdir(parents=True, exist_ok=True)
+        _user_folders.add(user_id)
+    return folder
@@ -14,6 +14,7 @@ import routes.get
 from middlewares.logging import RequestLoggerMiddleware
 from middlewares.headers import SecurityHeadersMiddleware
 from database import init_db
+from file_catalog import sync_with_disk
 from state import limiter
 
 API_KEY = os.getenv("SECRET_KEY", "supersecretkey123")
@@ -35,6 +36,9 @@ app = FastAPI(
 @app.on_event("startup")
 def startup_event():
     app.state.conn = init_db()
+    # serve.py syncs once in the master, instead of in every (recycled) worker
+    if os.getenv("CATALOG_SYNCED") != "1":
+        sync_with_disk(app.state.conn)
     app.state.limiter = limiter
 
 @app.on_event("shutdown")
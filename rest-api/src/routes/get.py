@@ -1,24 +1,30 @@
 from fastapi.routing import APIRouter
 from fastapi import Query, HTTPException, Request, Depends
-from fastapi.responses import FileResponse, PlainTextResponse
-from file_operations import validate, validate_user_file, get_user_folder
+from fastapi.responses import StreamingResponse
+from file_operations import validate, validate_user_file, get_user_folder, destination
+from downloads import download_response, content_stream
 import base64
-import aiofiles
 import json
+import compression
+from archives import FORMATS, archive_stream
 from typing import Optional
+import file_catalog
 from authentication.jwt import user_key, get_current_user_id
-from state import limiter
+from state import get_db, limiter
 
 router = APIRouter()
 
-def _read_b64_sync(path: str):
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
-
-async def _read_b64_async(path: str):
-    async with aiofiles.open(path, "rb") as fp:
-        bytes = await fp.read()
-        return base64.b64encode(bytes).decode()
+async def _b64_json(relative: str, chunks):
+    """``{"path": ..., "content": <base64>}`` built chunk by chunk instead of from the whole file."""
+    yield b'{"path": ' + json.dumps(relative).encode() + b', "content": "'
+    carry = b""
+    async for chunk in chunks:
+        chunk = carry + chunk
+        # base64 of a multiple of 3 bytes has no padding, so the pieces concatenate
+        cut = len(chunk) - len(chunk) % 3
+        carry = chunk[cut:]
+        yield base64.b64encode(chunk[:cut])
+    yield base64.b64encode(carry) + b'"}'
 
 @router.get("/file")
 @limiter.limit("10/minute", key_func=user_key)
@@ -26,7 +32,8 @@ async def _get_file(
     request: Request, 
     user_id: str = Depends(get_current_user_id),
     path: str = Query(..., description="Path to the file"), 
-    mode: Optional[str] = Query("base64", description="Mode: 'base64' for content or 'download' for file download")
+    mode: Optional[str] = Query("base64", description="Mode: 'base64' for content or 'download' for file download"),
+    conn=Depends(get_db),
 ):
     
     if path is None or str(path).strip() == "":
@@ -37,21 +44,77 @@ async def _get_file(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid file path.")
     
-    if (not validated_path.exists()) or (not validated_path.is_file()):
+    user_folder = get_user_folder(user_id)
+    entry = file_catalog.get(conn, user_id, validated_path.relative_to(user_folder).as_posix())
+    if entry is None:
         raise HTTPException(status_code=404, detail="File does not exist or is not a file.")
 
+    accept_encoding = request.headers.get("accept-encoding")
     m = (mode or "base64").lower()
     if m == "download":
-        return FileResponse(path=validated_path.as_posix(), media_type="application/octet-stream", filename=validated_path.name)
+        return download_response(validated_path, validated_path.relative_to(destination()).as_posix(), entry,
+                                 accept_encoding)
+
+    # base64 only uses 6 bits of each byte, so even incompressible content gets its 33% back
+    encoding = None
+    if entry["size"] >= compression.MIN_COMPRESS_SIZE:
+        encoding = compression.negotiate(accept_encoding)
+    body = _b64_json(str(validated_path.relative_to(user_folder)), content_stream(validated_path, entry, None))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        body = compression.encoded(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(body, media_type="application/json", headers=headers)
+
+
+@router.get("/files")
+@limiter.limit("30/minute", key_func=user_key)
+async def _list_files(
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of files to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    conn=Depends(get_db),
+):
+    files = file_catalog.list_files(conn, user_id, limit, cursor)
+    next_cursor = files[-1]["name"] if len(files) == limit else None
+    return {"files": files, "next_cursor": next_cursor}
 
-    try:
-        b64 = await _read_b64_async(str(validated_path))
-    except Exception:
-        b64 = _read_b64_sync(str(validated_path))
 
-    response = {
-        "path": str(validated_path.relative_to(get_user_folder(user_id))),
-        "content": b64
-    }
+@router.get("/files/archive")
+@limiter.limit("10/minute", key_func=user_key)
+async def _get_archive(
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+    names: Optional[list[str]] = Query(None, alias="name",
+                                       description="File to include, repeatable; all files if omitted"),
+    fmt: str = Query("zip", alias="format", pattern="^(zip|tar)$", description="Archive format: 'zip' or 'tar'"),
+    conn=Depends(get_db),
+):
+    """Zip or tar of the selected files, built while it is sent and never staged on disk."""
+    user_folder = get_user_folder(user_id)
+    if names:
+        entries, missing = [], []
+        for name in dict.fromkeys(names):
+            try:
+                relative = validate_user_file(name, user_id).relative_to(user_folder).as_posix()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid file path.")
+            entry = file_catalog.get(conn, user_id, relative)
+            if entry is None:
+                missing.append(name)
+            else:
+                entries.append(entry)
+        if missing:
+            raise HTTPException(status_code=404, detail={"missing": missing})
+    else:
+        entries = file_catalog.all_files(conn, user_id)
 
-    return PlainTextResponse(json.dumps(response), media_type="application/json")
+    body = archive_stream(fmt, [(user_folder / entry["name"], entry) for entry in entries])
+    headers = {"Content-Disposition": f'attachment; filename="files.{fmt}"', "Vary": "Accept-Encoding"}
+    # zip members are already deflated where it helps; a tar is compressed as a whole if the client accepts it
+    encoding = compression.negotiate(request.headers.get("accept-encoding")) if fmt == "tar" else None
+    if encoding:
+        body = compression.encoded(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(body, media_type=FORMATS[fmt], headers=headers)
@@ -1,85 +1,136 @@
 from fastapi.routing import APIRouter
-from fastapi import UploadFile, File, HTTPException, Request, Depends
-import aiofiles
-import time
+from fastapi import UploadFile, File, HTTPException, Request, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+import hashlib
+from typing import Optional
 
-from file_operations import safe_file_name, max_size, change, validate_user_file, get_user_quota_used
+import anyio
+
+import compression
+import file_catalog
+from file_operations import safe_file_name, max_size, change, validate_user_file, ensure_user_folder
 from authentication.jwt import get_current_user_id, user_key
-from state import limiter
+from state import get_db, limiter
+from upload_writer import UploadWriter
 
 router = APIRouter()
-_READ_SIZE = (1 << 16)
+# the multipart parser has already spooled the part, so each read above 1 MB is a threadpool call of its own
+_READ_SIZE = (1 << 20)
 USER_MAX_QUOTA = 1 * 1024 ** 3
+MAX_BATCH_FILES = 100
+_ENCODING_DESCRIPTION = ("Compression of the uploaded bytes: gzip, br or zstd. "
+                         "The Content-Encoding header of a file part also works.")
 
 
-@router.post("/file")
-@limiter.limit("10/minute", key_func=user_key)
-async def _save_file(
-    request: Request, 
-    file: UploadFile = File(..., description="File to upload"),
-    user_id: str = Depends(get_current_user_id),
-):
+class _UploadCodec:
+    """Turns received chunks into (logical bytes, bytes to store).
+
+    Decodes a compressed upload with the decompressed size capped at
+    ``limit``, and compresses the content again for storage when files are
+    kept compressed at rest. An upload that already arrives in the storage
+    encoding is stored exactly as received.
+    """
+
+    def __init__(self, upload_encoding: str | None, store_encoding: str | None, limit: int):
+        self.decoder = compression.decompressor(upload_encoding, limit) if upload_encoding else None
+        self.store_received = upload_encoding is not None and upload_encoding == store_encoding
+        self.encoder = (compression.compressor(store_encoding)
+                        if store_encoding and not self.store_received else None)
+
+    def __call__(self, received: bytes):
+        """``received`` is b"" once the upload is complete."""
+        data = received
+        if self.decoder is not None:
+            data = self.decoder.feed(received) if received else self.decoder.finish()
+        stored = received if self.store_received else data
+        if self.encoder is not None:
+            stored = self.encoder.compress(data) if received else self.encoder.compress(data) + self.encoder.flush()
+        return data, stored
+
+
+async def _store_upload(conn, user_id: str, file: UploadFile, encoding: str | None, quota_used: int) -> dict:
+    """Store one uploaded part; raises HTTPException when it is rejected."""
     file_name: str | None = getattr(file, "filename", None)
 
+    upload_encoding = (encoding or file.headers.get("content-encoding") or "identity").strip().lower()
+    if upload_encoding == "identity":
+        upload_encoding = None
+    elif upload_encoding not in compression.ENCODINGS:
+        raise HTTPException(status_code=415, detail=f"Unsupported encoding, use one of {compression.ENCODINGS}.")
+    if upload_encoding is None and file.size is not None and file.size > max_size():
+        raise HTTPException(status_code=413, detail="File size is to large.")
+
     try:
         safe = safe_file_name(file_name if file_name else "")
     except Exception as ex:
         raise HTTPException(status_code=400, detail=ex)
 
     try:
-        dst = validate_user_file(safe, user_id)
+        validate_user_file(safe, user_id)
     except ValueError as ex:
         raise HTTPException(status_code=400, detail=str(ex))
 
-    if dst.exists(): # If destination already exists create a new file with the current time
-        stem = dst.stem
-        suffix = dst.suffix
-        safe = ("%s_%d%s") % (stem, int(time.time()), suffix)
-        # dst = destination() / safe
-        dst = dst.parent / safe
+    # claiming the name in the catalog replaces the racy dst.exists() check:
+    # a taken name gets a timestamp suffix, as before
+    ensure_user_folder(user_id)
+    safe = await run_in_threadpool(file_catalog.reserve_name, conn, user_id, safe)
+    dst = validate_user_file(safe, user_id)
 
-    quota_used = get_user_quota_used(user_id)
+    content_type = file_catalog.content_type_for(safe, file.content_type)
+    # small files would only grow: like responses, they are kept as-is when the logical size is known
+    logical_size = file.size if upload_encoding is None else None
+    store_encoding = compression.STORE_ENCODING if compression.is_compressible(content_type, logical_size) else None
+    codec = None
+    if upload_encoding or store_encoding:
+        codec = _UploadCodec(upload_encoding, store_encoding, max_size())
+    # the stored size is only known up front when the bytes are kept as received
+    preallocate = file.size if codec is None or codec.store_received else None
+
+    digest = hashlib.sha256()
+    # size, digest and quota are all about the logical content, however it travels or is stored
     size = 0
     try:
-        async with aiofiles.open(dst, "wb") as o:
-            while True:
+        async with UploadWriter(dst, preallocate) as o:
+            done = False
+            while not done:
                 bytes_read = await file.read(_READ_SIZE)
-                if not bytes_read:
-                    break
-
-                size += len(bytes_read)
-                if size > max_size():
-                    try:
-                        await o.close()
-                    except Exception:
-                        pass
-
+                done = not bytes_read
+                data = stored = bytes_read
+                if codec is not None:
                     try:
-                        dst.unlink(missing_ok=True)
-                    except Exception:
-                        pass
+                        data, stored = await run_in_threadpool(codec, bytes_read)
+                    except compression.DecompressedTooLarge:
+                        raise HTTPException(status_code=413, detail="File size is to large.")
+                    except ValueError as ex:
+                        raise HTTPException(status_code=400, detail=str(ex))
 
+                size += len(data)
+                if size > max_size():
                     raise HTTPException(status_code=413, detail="File size is to large.")
-                
+
                 # Check per-user quota dynamically
                 if quota_used + size > USER_MAX_QUOTA:
-                    try:
-                        await o.close()
-                    except Exception:
-                        pass
-                    try:
-                        dst.unlink(missing_ok=True)
-                    except Exception:
-                        pass
                     raise HTTPException(status_code=400, detail="User quota exceeded (1GB max).")
-                
-                await o.write(bytes_read)
+
+                digest.update(data)
+                if stored:
+                    await o.write(stored)
+            mtime_ns = await o.commit()
+    except BaseException:
+        # the writer has already removed its temporary file; the shield lets the
+        # reservation be released even when the request was cancelled
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(file_catalog.discard, conn, user_id, safe)
+        raise
     finally:
         try:
             await file.close()
         except Exception:
             pass
 
+    await run_in_threadpool(file_catalog.finish, conn, user_id, safe, size, digest.hexdigest(), mtime_ns,
+                            content_type, store_encoding)
+
     relative = dst.relative_to(dst.parent).as_posix()
     return {
         "response": "ok",
@@ -88,3 +139,47 @@ async def _save_file(
         "stripped_path": change(relative)
     }
 
+
+@router.post("/file")
+@limiter.limit("10/minute", key_func=user_key)
+async def _save_file(
+    request: Request, 
+    file: UploadFile = File(..., description="File to upload"),
+    encoding: Optional[str] = Query(None, description=_ENCODING_DESCRIPTION),
+    user_id: str = Depends(get_current_user_id),
+    conn=Depends(get_db),
+):
+    return await _store_upload(conn, user_id, file, encoding, file_catalog.quota_used(conn, user_id))
+
+
+@router.post("/files")
+@limiter.limit("10/minute", key_func=user_key)
+async def _save_files(
+    request: Request,
+    files: list[UploadFile] = File(..., description=f"Files to upload, at most {MAX_BATCH_FILES}"),
+    encoding: Optional[str] = Query(None, description=_ENCODING_DESCRIPTION),
+    user_id: str = Depends(get_current_user_id),
+    conn=Depends(get_db),
+):
+    """Upload several files in one request.
+
+    Every part is stored or rejected on its own: the response lists each
+    with its ``status``, and the files stored before a rejected one are kept.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per request.")
+
+    # one quota lookup for the whole batch, kept up to date as parts are stored
+    quota_used = file_catalog.quota_used(conn, user_id)
+    results = []
+    for file in files:
+        try:
+            result = await _store_upload(conn, user_id, file, encoding, quota_used)
+        except HTTPException as ex:
+            results.append({"filename": file.filename, "status": ex.status_code, "detail": ex.detail})
+            continue
+        quota_used += result["size"]
+        results.append({"filename": file.filename, "status": 200, **result})
+
+    stored = sum(1 for result in results if result["status"] == 200)
+    return {"response": "ok" if stored == len(results) else "partial", "stored": stored, "files": results}
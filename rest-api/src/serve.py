@@ -0,0 +1,127 @@
+"""Production entry point: several uvicorn workers under one master process.
+
+Run from src with ``python serve.py``. With gunicorn installed (Linux) the
+master imports the app once and forks the workers from it (preload), recycles
+each worker after MAX_REQUESTS requests, and restarts them gracefully on
+SIGHUP. Without gunicorn it falls back to uvicorn's own process manager, which
+spawns fresh interpreters instead of forking. uvloop and httptools are used
+when installed, as uvicorn's "auto" settings pick them up.
+
+Settings (environment):
+    APP_PORT             port to bind (8000)
+    WEB_CONCURRENCY      worker count (usable CPU cores)
+    MAX_REQUESTS         recycle a worker after this many requests, 0 to never (10000)
+    MAX_REQUESTS_JITTER  random extra requests, so workers do not all restart at once (1000)
+    KEEPALIVE            seconds an idle keep-alive connection stays open (5)
+    BACKLOG              listen backlog (2048)
+    GRACEFUL_TIMEOUT     seconds workers get to finish requests on reload or stop (30)
+    PRELOAD              0 imports the app in each worker, so SIGHUP also reloads code (1)
+
+State shared between workers: the SQLite database (WAL mode, see database.py)
+and the upload folder. The catalog is synced with the upload folder once,
+here, before any worker starts. Rate-limit counters are per worker unless
+RATE_LIMIT_STORAGE_URI names a shared store.
+"""
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+from database import init_db
+from file_catalog import sync_with_disk
+from state import RATE_LIMIT_STORAGE_URI
+
+HOST = os.getenv("APP_HOST", "0.0.0.0")
+PORT = int(os.getenv("APP_PORT", 8000))
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", 10000))
+MAX_REQUESTS_JITTER = int(os.getenv("MAX_REQUESTS_JITTER", 1000))
+KEEPALIVE = int(os.getenv("KEEPALIVE", 5))
+BACKLOG = int(os.getenv("BACKLOG", 2048))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+PRELOAD = os.getenv("PRELOAD", "1") != "0"
+
+log = logging.getLogger("serve")
+
+
+def worker_count() -> int:
+    configured = int(os.getenv("WEB_CONCURRENCY", 0))
+    if configured > 0:
+        return configured
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS or Windows
+        return os.cpu_count() or 1
+
+
+def prepare(workers: int):
+    """One-time setup in the master, before the workers share the database."""
+    conn = init_db()
+    try:
+        sync_with_disk(conn)
+    finally:
+        conn.close()
+    # read by main.startup_event, so recycled workers do not rescan the upload folder
+    os.environ["CATALOG_SYNCED"] = "1"
+    if workers > 1 and RATE_LIMIT_STORAGE_URI.startswith("memory://"):
+        log.warning("%d workers with in-memory rate limits: each worker allows the full limit. "
+                    "Set RATE_LIMIT_STORAGE_URI to share them.", workers)
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def _run_gunicorn(workers: int):
+    from gunicorn.app.base import BaseApplication
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        from uvicorn.workers import UvicornWorker
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{HOST}:{PORT}",
+                "workers": workers,
+                "worker_class": UvicornWorker,
+                "preload_app": PRELOAD,
+                "max_requests": MAX_REQUESTS,
+                "max_requests_jitter": MAX_REQUESTS_JITTER,
+                "keepalive": KEEPALIVE,
+                "backlog": BACKLOG,
+                "graceful_timeout": GRACEFUL_TIMEOUT,
+                # runs in the master after binding, before the first worker is forked
+                "when_ready": lambda arbiter: prepare(workers),
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    Application().run()
+
+
+def _run_uvicorn(workers: int):
+    prepare(workers)
+    # a single uvicorn process has no manager to replace it, so it is only recycled with workers > 1
+    max_requests = MAX_REQUESTS if workers > 1 and MAX_REQUESTS > 0 else None
+    uvicorn.run("main:app", host=HOST, port=PORT, workers=workers, limit_max_requests=max_requests,
+                timeout_keep_alive=KEEPALIVE, backlog=BACKLOG, timeout_graceful_shutdown=GRACEFUL_TIMEOUT)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    workers = worker_count()
+    log.info("%d workers, loop=%s, http=%s", workers, "uvloop" if _available("uvloop") else "asyncio",
+             "httptools" if _available("httptools") else "h11")
+    if _available("gunicorn"):
+        _run_gunicorn(workers)
+    else:
+        _run_uvicorn(workers)
+
+
+if __name__ == "__main__":
+    main()
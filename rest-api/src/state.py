@@ -1,8 +1,16 @@
+import os
+
 from fastapi import Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"])
+# Counters live in this process unless RATE_LIMIT_STORAGE_URI points at a shared
+# store (e.g. redis://host:6379), so with N workers each one allows the full limit.
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+
+# RATE_LIMIT_ENABLED=0 turns rate limiting off, for load tests and benchmarks
+limiter = Limiter(key_func=get_remote_address, default_limits=["10/minute"],
+                  enabled=os.getenv("RATE_LIMIT_ENABLED", "1") != "0", storage_uri=RATE_LIMIT_STORAGE_URI)
 
 
 def get_db(request: Request):
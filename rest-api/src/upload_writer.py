@@ -0,0 +1,101 @@
+import errno
+import os
+import secrets
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+
+# received chunks are collected up to this size and written with one threadpool call
+WRITE_BUFFER_SIZE = int(os.getenv("UPLOAD_BUFFER_SIZE", 1 << 20))
+# safe_file_name strips leading dots, so no uploaded file can be mistaken for one of these
+TEMP_PREFIX = ".upload-"
+TEMP_SUFFIX = ".part"
+# posix_fallocate failures that only mean the filesystem cannot preallocate
+_NO_PREALLOCATION = {errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS}
+
+
+def is_temp_name(name: str) -> bool:
+    return name.startswith(TEMP_PREFIX) and name.endswith(TEMP_SUFFIX)
+
+
+class UploadWriter:
+    """Writes an upload to a temporary file next to ``dst``, renamed into place by ``commit``.
+
+    Chunks are buffered and written ``buffer_size`` bytes at a time, so a
+    10 MB upload costs ten threadpool calls rather than one per 64 KiB chunk.
+    When ``expected_size`` is known the file is preallocated, which keeps it
+    contiguous and fails early when the disk is full. Leaving the ``async with``
+    block without ``commit`` removes the temporary file, so an aborted upload
+    never shows up under its final name.
+    """
+
+    def __init__(self, dst: Path, expected_size: int | None = None, buffer_size: int = WRITE_BUFFER_SIZE):
+        self.dst = dst
+        self.tmp = dst.with_name(f"{TEMP_PREFIX}{secrets.token_hex(8)}{TEMP_SUFFIX}")
+        self.expected_size = expected_size
+        self.buffer_size = buffer_size
+        self.written = 0
+        self._buffer = bytearray()
+        self._fd = None
+
+    async def __aenter__(self):
+        self._fd = await run_in_threadpool(self._open)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._fd is not None:
+            await run_in_threadpool(self._discard)
+
+    def _open(self) -> int:
+        fd = os.open(self.tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_CLOEXEC", 0), 0o644)
+        if self.expected_size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, self.expected_size)
+            except OSError as ex:
+                if ex.errno not in _NO_PREALLOCATION:
+                    os.close(fd)
+                    self.tmp.unlink(missing_ok=True)
+                    raise
+        return fd
+
+    def _write_all(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+
+    async def write(self, data: bytes):
+        self.written += len(data)
+        if not self._buffer and len(data) >= self.buffer_size:
+            # already big enough, skip the copy into the buffer
+            await run_in_threadpool(self._write_all, data)
+            return
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            buffer, self._buffer = self._buffer, bytearray()
+            await run_in_threadpool(self._write_all, buffer)
+
+    def _finish(self, remaining) -> int:
+        try:
+            self._write_all(remaining)
+            if self.expected_size and self.expected_size > self.written:
+                # preallocated for more than was stored (a compressed copy, for one)
+                os.ftruncate(self._fd, self.written)
+            mtime_ns = os.fstat(self._fd).st_mtime_ns
+            os.close(self._fd)
+            self._fd = None
+            os.replace(self.tmp, self.dst)
+        except BaseException:
+            self._discard()
+            raise
+        return mtime_ns
+
+    async def commit(self) -> int:
+        """Write what is buffered and move the file to ``dst``; returns its mtime in ns."""
+        buffer, self._buffer = self._buffer, bytearray()
+        return await run_in_threadpool(self._finish, buffer)
+
+    def _discard(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.tmp.unlink(missing_ok=True)